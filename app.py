@@ -7,18 +7,22 @@ load_dotenv()
 # Set the API key as an environment variable
 os.environ["LANGEXTRACT_API_KEY"] = os.getenv("LANGEXTRACT_API_KEY", "")
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context
+import json
 import traceback
 
 # Import our refactored modules
 from config import Config
 from extraction_service import ExtractionService
+from job_manager import JobManager, QueueFullError
+from resilience import ProviderUnavailableError
 
 # Initialize Flask app
 app = Flask(__name__, static_folder="static", template_folder="templates")
 
 # Initialize services
 extraction_service = ExtractionService()
+job_manager = JobManager()
 
 # Validate configuration on startup
 Config.validate_api_key()
@@ -35,9 +39,10 @@ def send_static(path):
 
 @app.route("/saved_results")
 def get_saved_results():
-    """Get the most recently saved extraction results"""
+    """Get the most recently saved extraction results, or the one at ?index=N"""
     try:
-        result_data, message = extraction_service.load_saved_results()
+        position = request.args.get("index", -1, type=int)
+        result_data, message = extraction_service.load_saved_results(position)
         
         if result_data is None:
             return jsonify({"error": message}), 404
@@ -51,51 +56,355 @@ def get_saved_results():
     except Exception as e:
         return jsonify({"error": f"Error reading saved results: {str(e)}"}), 500
 
+@app.route("/results")
+def list_results():
+    """Query saved results by model, examples type, extraction class, attribute and time"""
+    if extraction_service.result_store is None:
+        return jsonify({"error": "Result store is disabled."}), 404
+    try:
+        results, next_cursor = extraction_service.result_store.query(
+            model_id=request.args.get("model_id"),
+            examples_type=request.args.get("examples_type"),
+            extraction_class=request.args.get("extraction_class"),
+            attribute=request.args.get("attribute"),
+            since=request.args.get("since", type=float),
+            until=request.args.get("until", type=float),
+            cursor=request.args.get("cursor"),
+            limit=request.args.get("limit", type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"results": results, "count": len(results), "next_cursor": next_cursor})
+
+@app.route("/results/<result_id>")
+def get_result(result_id):
+    """Get one saved result with its full extractions"""
+    if extraction_service.result_store is None:
+        return jsonify({"error": "Result store is disabled."}), 404
+    record = extraction_service.result_store.get(result_id)
+    if record is None:
+        return jsonify({"error": "Unknown result ID."}), 404
+    return jsonify(record)
+
+@app.route("/search")
+def search_extractions():
+    """Ranked full-text search over extraction text and attribute values"""
+    if extraction_service.result_store is None:
+        return jsonify({"error": "Result store is disabled."}), 404
+    try:
+        hits = extraction_service.result_store.search(
+            request.args.get("q", ""),
+            extraction_classes=request.args.getlist("extraction_class"),
+            model_id=request.args.get("model_id"),
+            limit=request.args.get("limit", type=int),
+            offset=request.args.get("offset", 0, type=int)
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"results": hits, "count": len(hits)})
+
+def run_prediction(input_text, examples_type, model_id, incremental=False):
+    """Run extraction, save and serialization for a single text"""
+    print(f"Processing with model: {model_id}")
+    
+    # Extract entities with selected examples type and model
+    stats = {}
+    result = extraction_service.extract_entities(
+        input_text, 
+        examples_type=examples_type,
+        model_id=model_id,
+        stats=stats,
+        incremental=incremental
+    )
+    
+    # Save results under the requested model; the models that actually answered go alongside
+    model_requested = stats.get("model_requested", model_id)
+    model_used = stats.get("model_answered", model_requested)
+    models_answered = stats.get("models_answered", [model_requested])
+    result_ids = extraction_service.save_results(
+        result,
+        {"model_id": model_requested, "models_answered": models_answered, "examples_type": examples_type}
+    )
+    
+    # Serialize results for JSON response
+    extractions, extractions_count = extraction_service.serialize_extractions(result)
+    
+    return {
+        "result": {"extractions": extractions},
+        "result_id": result_ids[0] if result_ids else None,
+        "message": f"Extraction completed and saved to {Config.RESULT_LOG_DIR}",
+        "extractions_count": extractions_count,
+        "examples_type": examples_type,
+        "model_used": model_used,
+        "models_answered": models_answered,
+        "token_estimate": stats.get("token_estimate"),
+        "chunks": stats.get("chunks"),
+        "routing": stats.get("routing")
+    }
+
+def parse_prediction_request(data):
+    """Read text, examples_type, model_id and incremental from a request body"""
+    data = data or {}
+    input_text = data.get("text", "")
+    examples_type = data.get("examples_type", "medical")
+    model_id = data.get("model_id", "gemini-2.5-pro")  # Default to current config model
+    incremental = bool(data.get("incremental", False))
+    return input_text, examples_type, model_id, incremental
+
+@app.route("/cache/stats")
+def get_cache_stats():
+    """Get extraction cache hit/miss and request coalescing counters"""
+    single_flight = extraction_service.in_flight.stats()
+    if extraction_service.cache is None:
+        return jsonify({"enabled": False, "single_flight": single_flight})
+    return jsonify({"enabled": True, **extraction_service.cache.stats(), "single_flight": single_flight})
+
+@app.route("/models/status")
+def get_model_status():
+    """Get recent per-model latency percentiles, hedging counters, circuit states and provider pools"""
+    return jsonify({
+        "latency": extraction_service.latency_tracker.stats(),
+        "hedging": extraction_service.hedger.stats() if extraction_service.hedger else None,
+        "circuits": extraction_service.resilience.stats(),
+        "provider": {"name": extraction_service.provider.name, **extraction_service.provider.stats()}
+    })
+
 @app.route("/predict", methods=["POST"])
 def predict():
     """Process text and extract entities"""
     try:
         # Get input data
-        data = request.get_json()
-        input_text = data.get("text", "")
-        examples_type = data.get("examples_type", "medical")
-        model_id = data.get("model_id", "gemini-2.5-pro")  # Default to current config model
+        input_text, examples_type, model_id, incremental = parse_prediction_request(request.get_json())
         
         if not input_text:
             return jsonify({"error": "No input text provided."}), 400
         
-        print(f"Processing with model: {model_id}")
+        return jsonify(run_prediction(input_text, examples_type, model_id, incremental))
+            
+    except ProviderUnavailableError as e:
+        # Provider outage or open circuit; the client should retry later
+        return jsonify({"error": str(e)}), 503
+    except ValueError as e:
+        # API key or configuration errors
+        return jsonify({"error": str(e)}), 500
+    except Exception as e:
+        # Unexpected errors
+        print(f"Error during extraction: {str(e)}")
+        traceback.print_exc()
+        return jsonify({"error": f"Extraction failed: {str(e)}"}), 500
+
+@app.route("/predict/stream", methods=["POST"])
+def predict_stream():
+    """Process text chunk by chunk, streaming extractions as they finish
+    
+    Responds with NDJSON by default, or Server-Sent Events when the client
+    sends "Accept: text/event-stream" or "?format=sse".
+    """
+    # Long texts stream chunk by chunk, so unchanged chunks are reused regardless
+    input_text, examples_type, model_id, _ = parse_prediction_request(request.get_json())
+    
+    if not input_text:
+        return jsonify({"error": "No input text provided."}), 400
+    model_id = extraction_service.resolve_model(model_id, input_text)
+    
+    use_sse = (
+        request.args.get("format") == "sse"
+        or "text/event-stream" in request.headers.get("Accept", "")
+    )
+    
+    def format_event(payload):
+        if use_sse:
+            return f"event: {payload['event']}\ndata: {json.dumps(payload)}\n\n"
+        return json.dumps(payload) + "\n"
+    
+    def generate():
+        sections = extraction_service.stream_sections(input_text)
+        yield format_event({
+            "event": "start",
+            "sections": sections,
+            "examples_type": examples_type,
+            "model_used": model_id
+        })
         
-        # Extract entities with selected examples type and model
-        result = extraction_service.extract_entities(
-            input_text, 
-            examples_type=examples_type,
-            model_id=model_id
-        )
+        results = [None] * sections
+        answered = [None] * sections
+        try:
+            for index, count, result, answered_by in extraction_service.extract_stream(
+                input_text, examples_type=examples_type, model_id=model_id
+            ):
+                results[index] = result
+                answered[index] = answered_by
+                extractions, extractions_count = extraction_service.serialize_extractions(result)
+                yield format_event({
+                    "event": "extractions",
+                    "section": index,
+                    "sections": count,
+                    "extractions": extractions,
+                    "extractions_count": extractions_count,
+                    "model_used": answered_by
+                })
+            
+            # Save the combined document once every section is done
+            merged = extraction_service.merge_results(input_text, results)
+            model_used = extraction_service.answered_label(answered, model_id)
+            models_answered = extraction_service.answered_models(answered)
+            result_ids = extraction_service.save_results(
+                merged,
+                {"model_id": model_id, "models_answered": models_answered, "examples_type": examples_type}
+            )
+            extractions, extractions_count = extraction_service.serialize_extractions(merged)
+            yield format_event({
+                "event": "done",
+                "result_id": result_ids[0] if result_ids else None,
+                "extractions": extractions,
+                "extractions_count": extractions_count,
+                "message": f"Extraction completed and saved to {Config.RESULT_LOG_DIR}",
+                "examples_type": examples_type,
+                "model_used": model_used,
+                "models_answered": models_answered
+            })
+        except Exception as e:
+            print(f"Error during streaming extraction: {str(e)}")
+            traceback.print_exc()
+            yield format_event({"event": "error", "error": f"Extraction failed: {str(e)}"})
+    
+    mimetype = "text/event-stream" if use_sse else "application/x-ndjson"
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@app.route("/predict/batch", methods=["POST"])
+def predict_batch():
+    """Process many documents concurrently and return one result per document"""
+    try:
+        data = request.get_json() or {}
+        documents = data.get("documents")
+        
+        if not isinstance(documents, list) or not documents:
+            return jsonify({"error": "No documents provided."}), 400
+        
+        if len(documents) > Config.BATCH_MAX_DOCUMENTS:
+            return jsonify({
+                "error": f"Too many documents: {len(documents)} (limit {Config.BATCH_MAX_DOCUMENTS})."
+            }), 400
+        
+        # Per-document settings fall back to the batch-level defaults
+        default_examples_type = data.get("examples_type", "medical")
+        default_model_id = data.get("model_id", "gemini-2.5-pro")
+        batch = []
+        for index, document in enumerate(documents):
+            if not isinstance(document, dict) or not document.get("text"):
+                return jsonify({"error": f"Document {index} has no input text."}), 400
+            batch.append({
+                "text": document["text"],
+                "examples_type": document.get("examples_type", default_examples_type),
+                "model_id": extraction_service.resolve_model(
+                    document.get("model_id", default_model_id), document["text"]
+                )
+            })
         
-        # Save results
-        extraction_service.save_results(result)
+        try:
+            max_parallel = min(
+                int(data.get("max_parallel") or Config.BATCH_MAX_PARALLEL),
+                Config.BATCH_MAX_PARALLEL
+            )
+        except (TypeError, ValueError):
+            return jsonify({"error": "max_parallel must be an integer."}), 400
+        outcomes = extraction_service.extract_batch(batch, max_parallel=max(1, max_parallel))
         
-        # Serialize results for JSON response
-        extractions, extractions_count = extraction_service.serialize_extractions(result)
+        # Save all successful results in a single write
+        saved = [index for index, (result, _) in enumerate(outcomes) if result is not None]
+        result_ids = {}
+        if saved:
+            ids = extraction_service.save_results(
+                [outcomes[index][0] for index in saved],
+                [
+                    {"model_id": batch[index]["model_id"], "examples_type": batch[index]["examples_type"]}
+                    for index in saved
+                ]
+            )
+            result_ids = dict(zip(saved, ids))
         
-        # Return response
+        results = []
+        for index, (result, error) in enumerate(outcomes):
+            entry = {
+                "index": index,
+                "document_id": documents[index].get("document_id"),
+                "examples_type": batch[index]["examples_type"],
+                "model_used": batch[index]["model_id"]
+            }
+            if error is not None:
+                entry["error"] = error
+            else:
+                extractions, extractions_count = extraction_service.serialize_extractions(result)
+                entry["result"] = {"extractions": extractions}
+                entry["result_id"] = result_ids.get(index)
+                entry["extractions_count"] = extractions_count
+            results.append(entry)
+        
+        failed = sum(1 for _, error in outcomes if error is not None)
         return jsonify({
-            "result": {"extractions": extractions},
-            "message": f"Extraction completed and saved to {Config.OUTPUT_FILENAME}",
-            "extractions_count": extractions_count,
-            "examples_type": examples_type,
-            "model_used": model_id
+            "results": results,
+            "documents_count": len(results),
+            "failed_count": failed,
+            "message": f"Batch extraction completed and saved to {Config.RESULT_LOG_DIR}"
         })
-            
+    
     except ValueError as e:
         # API key or configuration errors
         return jsonify({"error": str(e)}), 500
     except Exception as e:
         # Unexpected errors
-        print(f"Error during extraction: {str(e)}")
+        print(f"Error during batch extraction: {str(e)}")
         traceback.print_exc()
-        return jsonify({"error": f"Extraction failed: {str(e)}"}), 500
+        return jsonify({"error": f"Batch extraction failed: {str(e)}"}), 500
+
+@app.route("/jobs", methods=["POST"])
+def submit_job():
+    """Queue an extraction job and return its ID immediately"""
+    input_text, examples_type, model_id, incremental = parse_prediction_request(request.get_json())
+    
+    if not input_text:
+        return jsonify({"error": "No input text provided."}), 400
+    
+    try:
+        job_id = job_manager.submit(run_prediction, input_text, examples_type, model_id, incremental)
+    except QueueFullError as e:
+        return jsonify({"error": str(e)}), 503
+    
+    return jsonify({
+        "job_id": job_id,
+        "status": JobManager.PENDING,
+        "status_url": f"/jobs/{job_id}",
+        "result_url": f"/jobs/{job_id}/result"
+    }), 202
+
+@app.route("/jobs/<job_id>")
+def get_job_status(job_id):
+    """Get the status of a queued extraction job"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    job.pop("result")
+    return jsonify(job)
+
+@app.route("/jobs/<job_id>/result")
+def get_job_result(job_id):
+    """Get the result of a finished extraction job"""
+    job = job_manager.get_job(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    
+    if job["status"] == JobManager.FAILED:
+        return jsonify({"error": f"Extraction failed: {job['error']}", "status": job["status"]}), 500
+    
+    if job["status"] != JobManager.COMPLETED:
+        return jsonify({"job_id": job_id, "status": job["status"]}), 202
+    
+    return jsonify(job["result"])
 
 if __name__ == "__main__":
     app.run(debug=True, host='0.0.0.0', port=5000)
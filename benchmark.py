@@ -0,0 +1,208 @@
+"""End-to-end throughput and latency benchmark for PharmExtract.
+
+Runs entirely offline against the fake model provider. Synthetic reports of
+increasing size are assembled from the curated report example texts. Each
+size is driven through ExtractionService stage by stage (prompt and example
+build, extraction, save_results, serialize_extractions) and through the
+/predict endpoint. Results are written as JSON so runs can be compared
+across commits:
+
+    python benchmark.py --sizes 1,4,16 --iterations 20 --output benchmark.json
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark PharmExtract with a stubbed model backend")
+    parser.add_argument("--sizes", default="1,4,16",
+                        help="comma-separated report sizes, in number of example reports joined together")
+    parser.add_argument("--iterations", type=int, default=20, help="requests per size and stage")
+    parser.add_argument("--concurrency", type=int, default=4, help="parallel clients for the /predict run")
+    parser.add_argument("--examples-type", default="medical")
+    parser.add_argument("--latency-ms", type=float, default=50, help="median fake model latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fake model error rate")
+    parser.add_argument("--output", default="benchmark_results.json")
+    return parser.parse_args()
+
+
+def configure_environment(args, workdir):
+    """Point Config at the fake provider and a scratch directory before any service module is imported"""
+    os.environ["MODEL_PROVIDER"] = "fake"
+    os.environ["FAKE_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["FAKE_ERROR_RATE"] = str(args.error_rate)
+    # Every iteration must reach the model; a cache hit would measure nothing
+    os.environ["CACHE_ENABLED"] = "false"
+    # Keep benchmark output out of the project; Config paths are read once at import
+    os.environ["RESULT_LOG_DIR"] = os.path.join(workdir, "results")
+    os.environ["RESULT_DB_PATH"] = os.path.join(workdir, "extraction_results.db")
+    os.environ["OUTPUT_FILENAME"] = os.path.join(workdir, "extraction_results.jsonl")
+    os.environ["CACHE_DIR"] = os.path.join(workdir, "cache", "extractions")
+    os.environ["CHUNK_CACHE_DIR"] = os.path.join(workdir, "cache", "chunks")
+
+
+def peak_rss_kb():
+    """Peak resident set size of this process so far, in KiB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(samples, percent):
+    """Nearest-rank percentile of a list of samples"""
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarize(samples, wall_seconds, rss_before, rss_after):
+    """Latency percentiles in milliseconds, throughput and RSS growth for one stage"""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "requests_per_second": round(len(samples) / wall_seconds, 2) if wall_seconds else None,
+        "peak_rss_kb": rss_after,
+        "peak_rss_growth_kb": rss_after - rss_before,
+    }
+
+
+def run_stage(func, inputs):
+    """Call func once per input, timing each call"""
+    samples = []
+    outputs = []
+    rss_before = peak_rss_kb()
+    started = time.perf_counter()
+    for item in inputs:
+        call_started = time.perf_counter()
+        outputs.append(func(item))
+        samples.append(time.perf_counter() - call_started)
+    wall = time.perf_counter() - started
+    return summarize(samples, wall, rss_before, peak_rss_kb()), outputs
+
+
+def run_concurrent(func, inputs, concurrency):
+    """Call func once per input from concurrency threads, timing each call"""
+    def timed(item):
+        call_started = time.perf_counter()
+        func(item)
+        return time.perf_counter() - call_started
+
+    rss_before = peak_rss_kb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        samples = list(executor.map(timed, inputs))
+    wall = time.perf_counter() - started
+    return summarize(samples, wall, rss_before, peak_rss_kb())
+
+
+def build_report(texts, size):
+    """Join size example report texts into one synthetic report"""
+    return "\n\n".join(texts[i % len(texts)] for i in range(size))
+
+
+def benchmark_service(service, report, args):
+    """Time each stage of a /predict request separately"""
+    inputs = [report] * args.iterations
+    stages = {}
+
+    stages["prompt_and_examples"], _ = run_stage(
+        lambda text: service.get_prompt_and_examples(args.examples_type, text), inputs
+    )
+    stages["extraction"], results = run_stage(
+        lambda text: service.extract_entities(text, args.examples_type), inputs
+    )
+    stages["save_results"], _ = run_stage(service.save_results, results)
+    stages["serialize_extractions"], serialized = run_stage(service.serialize_extractions, results)
+    return stages, serialized[-1][1]
+
+
+def benchmark_endpoint(client, report, args):
+    """Drive /predict end to end from concurrent clients"""
+    def post(iteration):
+        # A unique text per request, so single-flight cannot merge concurrent requests into one call
+        payload = {"text": f"{report}\n\nBenchmark request {iteration}.", "examples_type": args.examples_type}
+        response = client.post("/predict", json=payload)
+        if response.status_code != 200:
+            raise RuntimeError(f"/predict returned {response.status_code}: {response.get_json()}")
+
+    return run_concurrent(post, range(args.iterations), args.concurrency)
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)),
+            stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    workdir = tempfile.mkdtemp(prefix="pharmextract-benchmark-")
+    configure_environment(args, workdir)
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    output_path = os.path.abspath(args.output)
+
+    from app import app, extraction_service
+    from report_examples import get_examples_for_model
+
+    texts = [example.text for example in get_examples_for_model()]
+    sizes = [int(size) for size in args.sizes.split(",")]
+    client = app.test_client()
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "settings": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "examples_type": args.examples_type,
+            "fake_latency_ms": args.latency_ms,
+            "fake_error_rate": args.error_rate,
+        },
+        "sizes": [],
+    }
+
+    try:
+        for size in sizes:
+            text = build_report(texts, size)
+            print(f"Benchmarking report of {size} example(s), {len(text)} characters...")
+            stages, extractions_count = benchmark_service(extraction_service, text, args)
+            report["sizes"].append({
+                "reports_joined": size,
+                "characters": len(text),
+                "extractions": extractions_count,
+                "stages": stages,
+                "predict_endpoint": benchmark_endpoint(client, text, args),
+            })
+        # Queued results count towards the run; surface any write failures
+        extraction_service.result_writer.flush()
+        report["result_writer"] = extraction_service.result_writer.stats()
+    finally:
+        extraction_service.result_writer.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Benchmark results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
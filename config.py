@@ -14,7 +14,117 @@ class Config:
     MODEL_ID = "gemini-2.5-pro"
     
     # File paths
-    OUTPUT_FILENAME = "extraction_results.jsonl"
+    OUTPUT_FILENAME = os.getenv("OUTPUT_FILENAME", "extraction_results.jsonl")  # pre-segmentation log, imported once into RESULT_LOG_DIR
+    
+    # Segmented results log
+    RESULT_LOG_DIR = os.getenv("RESULT_LOG_DIR", "data/results")
+    RESULT_SEGMENT_MAX_BYTES = int(os.getenv("RESULT_SEGMENT_MAX_BYTES", str(64 * 1024 * 1024)))
+    RESULT_SEGMENT_MAX_AGE = float(os.getenv("RESULT_SEGMENT_MAX_AGE", "86400"))  # seconds
+    RESULT_RETENTION_DAYS = float(os.getenv("RESULT_RETENTION_DAYS", "90"))  # 0 keeps sealed segments forever
+    RESULT_RETENTION_BYTES = int(os.getenv("RESULT_RETENTION_BYTES", str(4 * 1024 * 1024 * 1024)))  # 0 means no size cap
+    
+    # Background result writer (group commit to the results log)
+    RESULT_FLUSH_INTERVAL = float(os.getenv("RESULT_FLUSH_INTERVAL", "0.05"))  # seconds to gather a batch
+    RESULT_BATCH_SIZE = int(os.getenv("RESULT_BATCH_SIZE", "256"))
+    RESULT_QUEUE_SIZE = int(os.getenv("RESULT_QUEUE_SIZE", "10000"))
+    RESULT_FSYNC = os.getenv("RESULT_FSYNC", "interval")  # always, interval or never
+    RESULT_FSYNC_INTERVAL = float(os.getenv("RESULT_FSYNC_INTERVAL", "1"))  # seconds
+    
+    # Indexed SQLite store of saved results behind /results
+    RESULT_STORE_ENABLED = os.getenv("RESULT_STORE_ENABLED", "true").lower() == "true"
+    RESULT_DB_PATH = os.getenv("RESULT_DB_PATH", "data/extraction_results.db")
+    RESULT_PAGE_SIZE = int(os.getenv("RESULT_PAGE_SIZE", "50"))
+    RESULT_MAX_PAGE_SIZE = int(os.getenv("RESULT_MAX_PAGE_SIZE", "500"))
+    
+    # Parquet export of stored extractions (result_export.py)
+    EXPORT_DIR = os.getenv("EXPORT_DIR", "data/exports")
+    EXPORT_BATCH_ROWS = int(os.getenv("EXPORT_BATCH_ROWS", "50000"))
+    EXPORT_COMPRESSION = os.getenv("EXPORT_COMPRESSION", "zstd")
+    
+    # Background job configuration
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+    JOB_QUEUE_DEPTH = int(os.getenv("JOB_QUEUE_DEPTH", "32"))
+    JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds
+    
+    # Batch extraction configuration
+    BATCH_MAX_PARALLEL = int(os.getenv("BATCH_MAX_PARALLEL", "8"))
+    BATCH_MAX_DOCUMENTS = int(os.getenv("BATCH_MAX_DOCUMENTS", "500"))
+    
+    # Section-aware chunking for streaming and long reports
+    CHUNK_WORKERS = int(os.getenv("CHUNK_WORKERS", "8"))
+    CHUNK_THRESHOLD_CHARS = int(os.getenv("CHUNK_THRESHOLD_CHARS", "4000"))
+    CHUNK_TARGET_CHARS = int(os.getenv("CHUNK_TARGET_CHARS", "0"))  # 0 packs chunks up to MAX_CHAR_BUFFER
+    CHUNK_MAX_CHARS = int(os.getenv("CHUNK_MAX_CHARS", "3000"))
+    CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", "200"))
+    DEDUP_MIN_OVERLAP = float(os.getenv("DEDUP_MIN_OVERLAP", "0.5"))  # fraction of the shorter span
+    
+    # Rule-based extraction of "LABEL: value" header fields ahead of the model call
+    HEADER_RULES_ENABLED = os.getenv("HEADER_RULES_ENABLED", "true").lower() == "true"
+    
+    # Few-shot example selection (0 sends every example)
+    EXAMPLE_TOP_K = int(os.getenv("EXAMPLE_TOP_K", "3"))
+    
+    # Token budget for a single model call (prompt + examples + one chunk)
+    TOKEN_BUDGET = int(os.getenv("TOKEN_BUDGET", "16000"))
+    TOKEN_BUDGET_MIN_EXAMPLES = int(os.getenv("TOKEN_BUDGET_MIN_EXAMPLES", "1"))
+    CHARS_PER_TOKEN = float(os.getenv("CHARS_PER_TOKEN", "4"))
+    MAX_CHAR_BUFFER = int(os.getenv("MAX_CHAR_BUFFER", "1000"))  # LangExtract chunk size
+    
+    # Routing for model_id "auto": inputs past any fast limit go to the strong model
+    ROUTER_FAST_MODEL = os.getenv("ROUTER_FAST_MODEL", "gemini-2.5-flash")
+    ROUTER_STRONG_MODEL = os.getenv("ROUTER_STRONG_MODEL", "gemini-2.5-pro")
+    ROUTER_FAST_MAX_CHARS = int(os.getenv("ROUTER_FAST_MAX_CHARS", "1500"))
+    ROUTER_FAST_MAX_TOKENS = int(os.getenv("ROUTER_FAST_MAX_TOKENS", "400"))
+    ROUTER_FAST_MAX_SECTIONS = int(os.getenv("ROUTER_FAST_MAX_SECTIONS", "4"))  # "LABEL:" lines
+    ROUTER_FAST_MAX_STATISTICS = int(os.getenv("ROUTER_FAST_MAX_STATISTICS", "3"))  # HR=, p<, CI ...
+    ROUTER_STRONG_MAX_P95 = float(os.getenv("ROUTER_STRONG_MAX_P95", "0"))  # seconds, 0 disables
+    ROUTER_MIN_SAMPLES = int(os.getenv("ROUTER_MIN_SAMPLES", "20"))
+    
+    # Hedged requests: backup model per primary, as "primary=backup,..."
+    HEDGE_ENABLED = os.getenv("HEDGE_ENABLED", "true").lower() == "true"
+    HEDGE_FALLBACKS = dict(
+        pair.strip().split("=", 1)
+        for pair in os.getenv("HEDGE_FALLBACKS", "gemini-2.5-pro=gemini-2.5-flash").split(",")
+        if "=" in pair
+    )
+    HEDGE_PERCENTILE = float(os.getenv("HEDGE_PERCENTILE", "95"))
+    HEDGE_MIN_SAMPLES = int(os.getenv("HEDGE_MIN_SAMPLES", "20"))
+    HEDGE_DEFAULT_DEADLINE = float(os.getenv("HEDGE_DEFAULT_DEADLINE", "45"))  # seconds
+    HEDGE_MIN_DEADLINE = float(os.getenv("HEDGE_MIN_DEADLINE", "2"))  # seconds
+    HEDGE_WORKERS = int(os.getenv("HEDGE_WORKERS", "32"))
+    LATENCY_WINDOW = int(os.getenv("LATENCY_WINDOW", "200"))  # samples kept per model
+    
+    # Retries and per-model circuit breakers around model calls
+    RETRY_MAX_ATTEMPTS = int(os.getenv("RETRY_MAX_ATTEMPTS", "3"))
+    RETRY_BASE_DELAY = float(os.getenv("RETRY_BASE_DELAY", "0.5"))  # seconds
+    RETRY_MAX_DELAY = float(os.getenv("RETRY_MAX_DELAY", "8"))  # seconds
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_TIMEOUT = float(os.getenv("BREAKER_RESET_TIMEOUT", "30"))  # seconds
+    
+    # Model provider: "langextract" calls the real API, "fake" is an offline stand-in
+    MODEL_PROVIDER = os.getenv("MODEL_PROVIDER", "langextract")
+    PROVIDER_POOL_SIZE = int(os.getenv("PROVIDER_POOL_SIZE", "10"))  # keep-alive connections per model
+    PROVIDER_POOL_SIZES = {
+        model_id.strip(): int(size)
+        for model_id, size in (
+            pair.split("=", 1) for pair in os.getenv("PROVIDER_POOL_SIZES", "").split(",") if "=" in pair
+        )
+    }  # per-model overrides, as "model=size,..."
+    PROVIDER_KEEPALIVE_EXPIRY = float(os.getenv("PROVIDER_KEEPALIVE_EXPIRY", "60"))  # idle seconds
+    FAKE_LATENCY_MS = float(os.getenv("FAKE_LATENCY_MS", "200"))  # median per call
+    FAKE_LATENCY_DISTRIBUTION = os.getenv("FAKE_LATENCY_DISTRIBUTION", "lognormal")  # fixed, uniform or lognormal
+    FAKE_LATENCY_SIGMA = float(os.getenv("FAKE_LATENCY_SIGMA", "0.5"))  # lognormal tail width
+    FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", "0"))  # fraction of calls failing with 503
+    FAKE_SEED = int(os.getenv("FAKE_SEED", "42"))
+    
+    # Extraction result cache configuration
+    CACHE_ENABLED = os.getenv("CACHE_ENABLED", "true").lower() == "true"
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+    CACHE_DIR = os.getenv("CACHE_DIR", ".cache/extractions")
+    CACHE_TTL = int(os.getenv("CACHE_TTL", "86400"))  # seconds
+    CACHE_MAX_DISK_BYTES = int(os.getenv("CACHE_MAX_DISK_BYTES", str(256 * 1024 * 1024)))
+    CHUNK_CACHE_MAX_ENTRIES = int(os.getenv("CHUNK_CACHE_MAX_ENTRIES", "2048"))
+    CHUNK_CACHE_DIR = os.getenv("CHUNK_CACHE_DIR", ".cache/chunks")
     
     @classmethod
     def validate_api_key(cls):
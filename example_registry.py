@@ -0,0 +1,88 @@
+from types import MappingProxyType
+from config import Config
+from example_selector import ExampleSelector
+from prompt_instructions import PromptInstructions
+from report_examples import ReportExamples
+from result_cache import ResultCache
+
+
+class ExampleRegistry:
+    """Prompt and few-shot examples built once and shared across requests
+
+    Building the example set means constructing every ExampleData/Extraction
+    object and dedenting every report text, so the registry does this at
+    startup and then hands the same read-only tuple to each request.
+    Callers must treat the returned examples as immutable.
+
+    When top_k is set, get() narrows the set to the examples most relevant
+    to the input text using a BM25 index that is also built at startup.
+    """
+
+    DEFAULT_TYPE = "medical"
+
+    BUILDERS = {
+        "medical": ReportExamples.get_medical_examples,
+        "financial": ReportExamples.get_financial_examples,
+        "legal": ReportExamples.get_legal_examples,
+    }
+
+    def __init__(self, top_k=None):
+        self.prompt = PromptInstructions.get_general_prompt()
+        self.top_k = top_k if top_k is not None else Config.EXAMPLE_TOP_K
+
+        examples = {}
+        selectors = {}
+        positions = {}
+        fingerprints = {}
+        for examples_type, builder in self.BUILDERS.items():
+            examples[examples_type] = tuple(builder())
+            selectors[examples_type] = ExampleSelector(examples[examples_type])
+            positions[examples_type] = {
+                id(example): position for position, example in enumerate(examples[examples_type])
+            }
+            # Selection is deterministic per input, so top_k completes the fingerprint
+            fingerprints[examples_type] = ResultCache.make_key(
+                self.prompt, repr(examples[examples_type]), f"top_k={self.top_k}"
+            )
+
+        self._examples = MappingProxyType(examples)
+        self._selectors = MappingProxyType(selectors)
+        self._positions = MappingProxyType(positions)
+        self._fingerprints = MappingProxyType(fingerprints)
+
+    def resolve_type(self, examples_type):
+        """Map an examples type to a registered one, defaulting to medical"""
+        return examples_type if examples_type in self._examples else self.DEFAULT_TYPE
+
+    def get(self, examples_type, input_text=None):
+        """Return the shared (prompt, examples) pair for an examples type
+
+        With input_text and a positive top_k, only the top-k most relevant
+        examples (plus any needed to cover every section type) are returned.
+        """
+        examples_type = self.resolve_type(examples_type)
+        examples = self._examples[examples_type]
+        if not input_text or self.top_k <= 0:
+            return self.prompt, examples
+
+        positions = self._selectors[examples_type].select(input_text, self.top_k)
+        return self.prompt, tuple(examples[position] for position in positions)
+
+    def positions(self, examples_type, examples):
+        """Return the registry positions of shared example instances"""
+        lookup = self._positions[self.resolve_type(examples_type)]
+        return tuple(lookup[id(example)] for example in examples)
+
+    def relevance(self, examples_type, input_text, examples):
+        """Return the BM25 score of each given example against the input"""
+        examples_type = self.resolve_type(examples_type)
+        scores = self._selectors[examples_type].scores(input_text or "")
+        return [scores[position] for position in self.positions(examples_type, examples)]
+
+    def fingerprint(self, examples_type):
+        """Return the content hash of the prompt and examples for a type"""
+        return self._fingerprints[self.resolve_type(examples_type)]
+
+    def types(self):
+        """Return the registered examples types"""
+        return tuple(self._examples)
@@ -0,0 +1,86 @@
+import math
+import re
+from collections import Counter
+from report_examples import PharmSectionType
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    """Lowercase word tokens used for example indexing"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class ExampleSelector:
+    """BM25 ranking of few-shot examples against an input text
+
+    The index over the example texts is built once. select() returns the
+    positions of the top-k examples for an input, topped up so that every
+    PharmSectionType still appears in at least one selected example.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(self, examples, required_classes=None):
+        self.size = len(examples)
+        self.required_classes = frozenset(
+            required_classes if required_classes is not None
+            else (section.value for section in PharmSectionType)
+        )
+        self._classes = [
+            frozenset(extraction.extraction_class for extraction in example.extractions)
+            for example in examples
+        ]
+
+        doc_tokens = [tokenize(example.text) for example in examples]
+        self._lengths = [len(tokens) for tokens in doc_tokens]
+        self._avg_length = (sum(self._lengths) / self.size) if self.size else 0.0
+
+        # term -> list of (example position, term frequency)
+        self._postings = {}
+        for position, tokens in enumerate(doc_tokens):
+            for term, freq in Counter(tokens).items():
+                self._postings.setdefault(term, []).append((position, freq))
+
+        self._idf = {
+            term: math.log(1 + (self.size - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def scores(self, text):
+        """Return the BM25 score of every example for the given text"""
+        scores = [0.0] * self.size
+        for term, query_freq in Counter(tokenize(text)).items():
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf[term]
+            for position, freq in postings:
+                norm = self.K1 * (1 - self.B + self.B * self._lengths[position] / self._avg_length)
+                scores[position] += query_freq * idf * freq * (self.K1 + 1) / (freq + norm)
+        return scores
+
+    def select(self, text, k):
+        """Return sorted positions of the examples to send for this text"""
+        if k <= 0 or k >= self.size:
+            return list(range(self.size))
+
+        scores = self.scores(text)
+        # Ties keep original order so selection is deterministic
+        ranked = sorted(range(self.size), key=lambda position: (-scores[position], position))
+        selected = ranked[:k]
+
+        covered = set()
+        for position in selected:
+            covered |= self._classes[position]
+        for position in ranked[k:]:
+            missing = (self.required_classes - covered) & self._classes[position]
+            if missing:
+                selected.append(position)
+                covered |= missing
+            if self.required_classes <= covered:
+                break
+
+        # Original order keeps the prompt prefix stable across requests
+        return sorted(selected)
@@ -0,0 +1,86 @@
+from config import Config
+
+# Lower rank wins when two extractions describe the same span
+ALIGNMENT_RANK = {
+    "match_exact": 0,
+    "match_greater": 1,
+    "match_lesser": 1,
+    "match_fuzzy": 2,
+}
+UNALIGNED_RANK = 3
+
+
+class ExtractionMerger:
+    """Deduplicates extractions produced by overlapping chunks
+
+    Extractions are sorted by char_interval and swept once per extraction
+    class. Each new span is compared only with the class's current surviving
+    span, so the whole pass is O(n log n) rather than pairwise. Two spans
+    of the same class are duplicates when their intersection covers at least
+    min_overlap of the shorter one. The survivor is chosen deterministically:
+    better alignment status (exact over greater/lesser over fuzzy), then the
+    longer span, then the earlier start, then the earlier chunk.
+    Extractions without a char_interval are deduplicated on class and text.
+    """
+
+    def __init__(self, min_overlap=None):
+        self.min_overlap = min_overlap if min_overlap is not None else Config.DEDUP_MIN_OVERLAP
+
+    def merge(self, extractions):
+        """Return deduplicated extractions ordered by position"""
+        positioned = []
+        unpositioned = {}
+        for order, extraction in enumerate(extractions):
+            interval = getattr(extraction, 'char_interval', None)
+            if interval is None or interval.start_pos is None or interval.end_pos is None:
+                key = (extraction.extraction_class, " ".join(extraction.extraction_text.split()).lower())
+                current = unpositioned.get(key)
+                if current is None or self._rank(extraction, order) < self._rank(current[1], current[0]):
+                    unpositioned[key] = (order, extraction)
+                continue
+            positioned.append((interval.start_pos, interval.end_pos, order, extraction))
+
+        positioned.sort(key=lambda item: (item[0], item[1], item[2]))
+
+        kept = []
+        active = {}  # extraction_class -> (start, end, order, extraction)
+        for item in positioned:
+            extraction_class = item[3].extraction_class
+            current = active.get(extraction_class)
+            if current is None:
+                active[extraction_class] = item
+                continue
+
+            if self._is_duplicate(current, item):
+                active[extraction_class] = min(current, item, key=lambda i: self._rank(i[3], i[2]))
+            elif item[1] > current[1]:
+                kept.append(current)
+                active[extraction_class] = item
+            else:
+                # Empty span inside the current one; nothing to merge it with
+                kept.append(item)
+
+        kept.extend(active.values())
+        kept.sort(key=lambda item: (item[0], item[1], item[2]))
+
+        result = [item[3] for item in kept]
+        result.extend(extraction for _, extraction in sorted(unpositioned.values(), key=lambda pair: pair[0]))
+        return result
+
+    def _is_duplicate(self, first, second):
+        overlap = min(first[1], second[1]) - max(first[0], second[0])
+        if overlap <= 0:
+            return False
+        shorter = min(first[1] - first[0], second[1] - second[0])
+        return shorter > 0 and overlap / shorter >= self.min_overlap
+
+    def _rank(self, extraction, order):
+        status = getattr(extraction, 'alignment_status', None)
+        status = getattr(status, 'value', status)
+        interval = getattr(extraction, 'char_interval', None)
+        length = 0
+        start = 0
+        if interval is not None and interval.start_pos is not None and interval.end_pos is not None:
+            length = interval.end_pos - interval.start_pos
+            start = interval.start_pos
+        return (ALIGNMENT_RANK.get(status, UNALIGNED_RANK), -length, start, order)
@@ -1,65 +1,485 @@
 import langextract as lx
-import json
-import os
+import atexit
+import copy
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from config import Config
+from example_registry import ExampleRegistry
+from extraction_merger import ExtractionMerger
+from header_extractor import HeaderExtractor
+from hedged_caller import HedgedCaller
+from latency_tracker import LatencyTracker
+from model_provider import create_provider
+from model_router import AUTO_MODEL, ModelRouter
+from resilience import ResilientCaller
+from report_chunker import ReportChunker
+from report_examples import PharmSectionType
+from result_cache import ResultCache
+from result_log import ResultLog
+from result_store import ResultStore
+from result_writer import ResultWriter
+from single_flight import SingleFlight
+from token_budget import TokenBudget
 
 class ExtractionService:
     """Service class for handling text extraction operations"""
     
     def __init__(self):
         self.config = Config
+        self.cache = ResultCache() if Config.CACHE_ENABLED else None
+        # Per-chunk results, stored with chunk-relative offsets, for incremental re-extraction
+        self.chunk_cache = ResultCache(
+            max_entries=Config.CHUNK_CACHE_MAX_ENTRIES,
+            cache_dir=Config.CHUNK_CACHE_DIR
+        ) if Config.CACHE_ENABLED else None
+        self.in_flight = SingleFlight()
+        self.result_store = ResultStore() if Config.RESULT_STORE_ENABLED else None
+        # Results expired from the log are removed from the store as well
+        self.result_log = ResultLog(on_drop=self.result_store.delete if self.result_store else None)
+        self.result_writer = ResultWriter(self.result_log, self.result_store)
+        atexit.register(self.result_writer.close)
+        self.example_registry = ExampleRegistry()
+        self.token_budget = TokenBudget()
+        self.chunker = ReportChunker()
+        self.merger = ExtractionMerger()
+        self.header_extractor = HeaderExtractor() if Config.HEADER_RULES_ENABLED else None
+        self.provider = create_provider()
+        self.latency_tracker = LatencyTracker()
+        self.router = ModelRouter(self.latency_tracker, self.token_budget)
+        self.hedger = HedgedCaller(self.latency_tracker) if Config.HEDGE_ENABLED else None
+        self.resilience = ResilientCaller()
+        # Shared pool bounds chunk-level model calls across all requests
+        self.chunk_executor = ThreadPoolExecutor(
+            max_workers=Config.CHUNK_WORKERS,
+            thread_name_prefix="extraction-chunk"
+        )
     
-    def extract_entities(self, input_text, examples_type="medical", model_id=None):
-        """Extract entities from input text using LangExtract"""
-        if not self.config.LANGEXTRACT_API_KEY:
+    def extract_entities(self, input_text, examples_type="medical", model_id=None, stats=None,
+                         incremental=False):
+        """Extract entities from input text using LangExtract
+        
+        If a dict is passed as stats, request size estimates are written into it.
+        With incremental=True the text is always processed chunk by chunk so
+        chunks unchanged since an earlier submission reuse their cached results
+        and only edited chunks are sent to the model.
+        """
+        if self.provider.requires_api_key and not self.config.LANGEXTRACT_API_KEY:
             raise ValueError("API key not configured. Please check your .env file.")
         
         # Use provided model_id or fall back to config default
-        model_to_use = model_id if model_id else self.config.MODEL_ID
+        model_to_use = self.resolve_model(model_id, input_text, stats)
+        if stats is not None:
+            stats["model_requested"] = model_to_use
         
         print(f"Processing text with {len(input_text)} characters...")
         print(f"Using examples type: {examples_type}")
         print(f"Using model: {model_to_use}")
         
-        # Import here to avoid circular imports
-        from prompt_instructions import PromptInstructions
-        from report_examples import ReportExamples
+        prompt, examples = self.get_prompt_and_examples(examples_type, input_text, stats)
+        print(f"Using {len(examples)} few-shot examples")
+        
+        request_key = ResultCache.make_key(
+            input_text,
+            examples_type,
+            model_to_use,
+            self.example_registry.fingerprint(examples_type),
+            self.example_registry.positions(examples_type, examples),
+            "incremental" if incremental else "full",
+            "header-rules" if self.header_extractor is not None else "model-only"
+        )
+        
+        if self.cache is not None:
+            cached = self.cache.get(request_key)
+            if cached is not None:
+                print(f"Cache hit for {request_key[:12]}")
+                return cached
         
-        # Always use general prompt
-        prompt = PromptInstructions.get_general_prompt()
+        def run_extraction():
+            if incremental or len(input_text) > self.config.CHUNK_THRESHOLD_CHARS:
+                result, answered = self._extract_chunked(input_text, examples_type, model_to_use, stats)
+            else:
+                result, answered_by = self._extract_text(input_text, prompt, examples, model_to_use)
+                answered = [answered_by]
+            answered_by = self.answered_label(answered, model_to_use)
+            if stats is not None:
+                stats["model_answered"] = answered_by
+                stats["models_answered"] = self.answered_models(answered)
+            if answered_by != model_to_use:
+                # A hedged backup answer is not cached as the requested model's result
+                return result
+            # Cache before the in-flight entry is released so no request slips between
+            if self.cache is not None:
+                self.cache.put(request_key, result)
+            return result
         
-        # Select examples based on type
-        if examples_type == "financial":
-            examples = ReportExamples.get_financial_examples()
-        elif examples_type == "legal":
-            examples = ReportExamples.get_legal_examples()
-        else:  # default to medical
-            examples = ReportExamples.get_medical_examples()
+        # Identical concurrent requests share one model call
+        result, shared = self.in_flight.do(request_key, run_extraction)
+        if shared:
+            print(f"Joined in-flight extraction for {request_key[:12]}")
+            return copy.deepcopy(result)
+        
+        print(f"Extraction completed successfully. Result type: {type(result)}")
+        return result
+    
+    def extract_stream(self, input_text, examples_type="medical", model_id=None):
+        """Extract entities chunk by chunk, yielding results as they finish
+        
+        Yields (chunk_index, chunk_count, result, model_that_answered) tuples
+        in completion order. Each result's char_interval offsets are relative
+        to the full input text, not the chunk. Text up to CHUNK_THRESHOLD_CHARS
+        is one section, extracted through extract_entities so it shares the
+        full-result cache and in-flight calls with /predict.
+        """
+        if self.provider.requires_api_key and not self.config.LANGEXTRACT_API_KEY:
+            raise ValueError("API key not configured. Please check your .env file.")
+        
+        model_to_use = self.resolve_model(model_id, input_text)
+        if self.stream_sections(input_text) == 1:
+            stats = {}
+            result = self.extract_entities(input_text, examples_type, model_to_use, stats)
+            answered = stats.get("models_answered", [model_to_use])
+            yield 0, 1, result, answered[0] if answered else None
+            return
+        chunks = self.split_chunks(input_text)
+        
+        print(f"Streaming {len(chunks)} chunks with model: {model_to_use}")
+        
+        futures = {
+            self.chunk_executor.submit(self._extract_chunk, chunk, examples_type, model_to_use): index
+            for index, chunk in enumerate(chunks)
+        }
+        try:
+            for future in as_completed(futures):
+                result, _, answered_by = future.result()
+                yield futures[future], len(chunks), result, answered_by
+        finally:
+            # A disconnected client should not leave queued chunks running
+            for future in futures:
+                future.cancel()
+    
+    def resolve_model(self, model_id, input_text, stats=None):
+        """Return the model to call, routing "auto" by input size and complexity"""
+        if not model_id:
+            return self.config.MODEL_ID
+        if model_id != AUTO_MODEL:
+            return model_id
+        routed, decision = self.router.route(input_text)
+        print(f"Routed to {routed}: {', '.join(decision['reasons'])}")
+        if stats is not None:
+            stats["routing"] = decision
+        return routed
+    
+    @staticmethod
+    def answered_models(models):
+        """List the distinct models that answered a request's chunks, in first-answer order
         
-        result = lx.extract(
-            text_or_documents=input_text,
+        Chunks extracted by rule alone (None) do not count.
+        """
+        return [model for model in dict.fromkeys(models) if model]
+    
+    @classmethod
+    def answered_label(cls, models, requested_model):
+        """Name the answering models for display; the requested model if none was called"""
+        answered = cls.answered_models(models)
+        return ", ".join(answered) if answered else requested_model
+    
+    def stream_sections(self, input_text):
+        """Number of sections extract_stream yields for input_text"""
+        if len(input_text) <= self.config.CHUNK_THRESHOLD_CHARS:
+            return 1
+        return len(self.split_chunks(input_text))
+    
+    def split_chunks(self, input_text):
+        """Split a report into section-aligned chunks"""
+        return self.chunker.split(input_text)
+    
+    def _extract_chunked(self, input_text, examples_type, model_to_use, stats=None):
+        """Extract a long report as concurrent section-aligned chunks
+        
+        Returns (merged_result, answered_by) with one entry per chunk naming
+        the model that answered it, or None where rules extracted it alone.
+        """
+        chunks = self.split_chunks(input_text)
+        print(f"Extracting {len(chunks)} chunks concurrently")
+        
+        usages = [{} for _ in chunks]
+        futures = [
+            self.chunk_executor.submit(self._extract_chunk, chunk, examples_type, model_to_use, usage)
+            for chunk, usage in zip(chunks, usages)
+        ]
+        try:
+            outcomes = [future.result() for future in futures]
+        except Exception:
+            for future in futures:
+                future.cancel()
+            raise
+        
+        reused = sum(1 for _, was_cached, _ in outcomes if was_cached)
+        print(f"Reused {reused} of {len(chunks)} chunks from earlier extractions")
+        if stats is not None:
+            stats["chunks"] = {
+                "total": len(chunks),
+                "reused": reused,
+                "extracted": len(chunks) - reused
+            }
+            # Each chunk is its own call with its own examples, so its estimate replaces the whole-text one
+            stats["token_estimate"] = self.token_budget.combine(usage["token_estimate"] for usage in usages)
+        merged = self.merge_results(input_text, [result for result, _, _ in outcomes])
+        return merged, [answered_by for _, _, answered_by in outcomes]
+    
+    def _extract_chunk(self, chunk, examples_type, model_to_use, stats=None):
+        """Extract one chunk and remap its offsets into the full document
+        
+        Results are cached by chunk content with chunk-relative offsets, so a
+        chunk that reappears unchanged, even at a new position after an edit
+        elsewhere, is reused and shifted instead of re-extracted. Identical
+        chunks extracted concurrently, by one request or several (for example
+        reviewers streaming the same report), share one model call. Returns
+        (result, was_cached, model_that_answered); the chunk's token estimate
+        is written into stats when a dict is given.
+        """
+        prompt, examples = self.get_prompt_and_examples(examples_type, chunk.text, stats)
+        
+        chunk_key = ResultCache.make_key(
+            chunk.text,
+            examples_type,
+            model_to_use,
+            self.example_registry.fingerprint(examples_type),
+            self.example_registry.positions(examples_type, examples),
+            "header-rules" if self._uses_header_rules(chunk) else "model-only"
+        )
+        if self.chunk_cache is not None:
+            cached = self.chunk_cache.get(chunk_key)
+            if cached is not None:
+                self._shift_extractions(cached, chunk.start)
+                # Only answers from model_to_use, or from rules alone, are cached
+                answered_by = None if self._rules_only(chunk) else model_to_use
+                return cached, True, answered_by
+        
+        def run_chunk():
+            if self._uses_header_rules(chunk):
+                result, answered_by = self._extract_text(chunk.text, prompt, examples, model_to_use)
+            else:
+                result, answered_by = self._call_model(chunk.text, prompt, examples, model_to_use)
+            # Cache before the in-flight entry is released so no caller slips between
+            if self.chunk_cache is not None and answered_by in (None, model_to_use):
+                self.chunk_cache.put(chunk_key, result)
+            return result, answered_by
+        
+        (shared_result, answered_by), shared = self.in_flight.do("chunk:" + chunk_key, run_chunk)
+        if shared:
+            print(f"Joined in-flight chunk extraction for {chunk_key[:12]}")
+        # Every caller shifts its own copy; the in-flight result may be shared
+        result = copy.deepcopy(shared_result)
+        self._shift_extractions(result, chunk.start)
+        return result, False, answered_by
+    
+    def _uses_header_rules(self, chunk):
+        """Only chunks that open with the report header go through the rule-based fast path"""
+        return self.header_extractor is not None and chunk.kind == PharmSectionType.HEADER.value
+    
+    def _rules_only(self, chunk):
+        """True when the header rules cover the whole chunk, so no model is called"""
+        if not self._uses_header_rules(chunk):
+            return False
+        header, body_start = self.header_extractor.extract(chunk.text)
+        return bool(header) and body_start >= len(chunk.text)
+    
+    def _extract_text(self, text, prompt, examples, model_to_use):
+        """Extract leading header fields by rule and send only the rest to the model
+        
+        Header-only text never reaches the model. Returns (result, model_that_answered),
+        where the model is None when rules extracted everything.
+        """
+        if self.header_extractor is None:
+            return self._call_model(text, prompt, examples, model_to_use)
+        header, body_start = self.header_extractor.extract(text)
+        if not header:
+            return self._call_model(text, prompt, examples, model_to_use)
+        if body_start >= len(text):
+            print(f"Extracted {len(header)} header fields by rule, no model call needed")
+            return lx.data.AnnotatedDocument(text=text, extractions=header), None
+        
+        print(f"Extracted {len(header)} header fields by rule, sending {len(text) - body_start} "
+              f"characters to the model")
+        result, answered_by = self._call_model(text[body_start:], prompt, examples, model_to_use)
+        self._shift_extractions(result, body_start)
+        extractions = header + list(getattr(result, 'extractions', None) or [])
+        return lx.data.AnnotatedDocument(text=text, extractions=extractions), answered_by
+    
+    def _call_model(self, text, prompt, examples, model_to_use):
+        """Run one extraction call with retries, circuit breaking and hedging
+        
+        Returns (result, model_that_answered).
+        """
+        def attempt(model_id):
+            return self.resilience.call(
+                lambda target: self._run_extract(text, prompt, examples, target),
+                model_id
+            )
+        
+        if self.hedger is None:
+            return attempt(model_to_use)
+        return self.hedger.call(attempt, model_to_use)
+    
+    def _run_extract(self, text, prompt, examples, model_id):
+        """Call the model provider and record its latency for the model"""
+        started = time.monotonic()
+        result = self.provider.extract(
+            text_or_documents=text,
             prompt_description=prompt,
             examples=examples,
-            model_id=model_to_use,
+            model_id=model_id,
             api_key=self.config.LANGEXTRACT_API_KEY,
+            max_char_buffer=self.config.MAX_CHAR_BUFFER,
         )
-        
-        print(f"Extraction completed successfully. Result type: {type(result)}")
+        self.latency_tracker.record(model_id, time.monotonic() - started)
         return result
     
-    def save_results(self, result):
-        """Save extraction results to file"""
-        try:
-            lx.io.save_annotated_documents(
-                [result], 
-                output_name=self.config.OUTPUT_FILENAME, 
-                output_dir="."
+    def merge_results(self, input_text, results):
+        """Combine per-chunk results into one deduplicated annotated document
+        
+        Overlapping chunks can extract the same span twice, so duplicates are
+        merged by char_interval before the document is assembled.
+        """
+        extractions = []
+        for result in results:
+            extractions.extend(getattr(result, 'extractions', None) or [])
+        merged = self.merger.merge(extractions)
+        if len(merged) < len(extractions):
+            print(f"Merged {len(extractions) - len(merged)} duplicate extractions across chunks")
+        return lx.data.AnnotatedDocument(extractions=merged, text=input_text)
+    
+    def _shift_extractions(self, result, offset):
+        """Move char_interval offsets of a chunk result into document space"""
+        for extraction in getattr(result, 'extractions', None) or []:
+            interval = getattr(extraction, 'char_interval', None)
+            if interval is None:
+                continue
+            if interval.start_pos is not None:
+                interval.start_pos += offset
+            if interval.end_pos is not None:
+                interval.end_pos += offset
+    
+    def get_prompt_and_examples(self, examples_type="medical", input_text=None, stats=None):
+        """Get the shared prompt and few-shot examples for an examples type
+        
+        Passing input_text narrows the examples to those most relevant to it
+        and drops the least relevant ones if the request would exceed the token
+        budget. Token estimates are written into stats when a dict is given.
+        """
+        prompt, examples = self.example_registry.get(examples_type, input_text)
+        if input_text is None:
+            return prompt, examples
+        
+        priorities = self.example_registry.relevance(examples_type, input_text, examples)
+        examples, usage = self.token_budget.fit(prompt, examples, input_text, priorities)
+        if usage["examples_dropped"]:
+            print(f"Token budget: dropped {usage['examples_dropped']} examples "
+                  f"({usage['per_call_tokens']}/{usage['budget']} tokens per call)")
+        if stats is not None:
+            stats["token_estimate"] = usage
+        return prompt, tuple(examples)
+    
+    def extract_batch(self, documents, max_parallel=None):
+        """Extract entities from many documents concurrently
+        
+        Each document is a dict with "text" and optional "examples_type" and
+        "model_id". Documents sharing examples type and model are sent to
+        the model provider together as one list of lx.data.Document objects. Returns
+        one (result, error) pair per document, in input order.
+        """
+        if self.provider.requires_api_key and not self.config.LANGEXTRACT_API_KEY:
+            raise ValueError("API key not configured. Please check your .env file.")
+        
+        max_parallel = max_parallel or self.config.BATCH_MAX_PARALLEL
+        
+        # Group documents that can share a single model call
+        groups = {}
+        for index, document in enumerate(documents):
+            examples_type = document.get("examples_type") or "medical"
+            model_to_use = self.resolve_model(document.get("model_id"), document["text"])
+            groups.setdefault((examples_type, model_to_use), []).append(index)
+        
+        print(f"Processing batch of {len(documents)} documents in {len(groups)} groups "
+              f"with parallelism {max_parallel}")
+        
+        outcomes = [(None, None)] * len(documents)
+        group_workers = min(len(groups), max_parallel) or 1
+        workers_per_group = max(1, max_parallel // group_workers)
+        
+        def run_group(examples_type, model_to_use, indices):
+            group_text = "\n".join(documents[i]["text"] for i in indices)
+            prompt, examples = self.get_prompt_and_examples(examples_type, group_text)
+            lx_documents = [
+                lx.data.Document(text=documents[i]["text"], document_id=f"doc_{i}")
+                for i in indices
+            ]
+            # Batch results are reported per requested model, so no fallback routing here
+            results, _ = self.resilience.call(
+                lambda target: self.provider.extract(
+                    text_or_documents=lx_documents,
+                    prompt_description=prompt,
+                    examples=examples,
+                    model_id=target,
+                    api_key=self.config.LANGEXTRACT_API_KEY,
+                    max_char_buffer=self.config.MAX_CHAR_BUFFER,
+                    max_workers=workers_per_group,
+                    batch_length=workers_per_group,
+                ),
+                model_to_use,
+                allow_fallback=False
             )
-            print(f"Results saved to {self.config.OUTPUT_FILENAME}")
-            return True
+            return {result.document_id: result for result in results}
+        
+        with ThreadPoolExecutor(max_workers=group_workers) as executor:
+            futures = {
+                executor.submit(run_group, examples_type, model_to_use, indices): indices
+                for (examples_type, model_to_use), indices in groups.items()
+            }
+            for future in as_completed(futures):
+                indices = futures[future]
+                try:
+                    results_by_id = future.result()
+                except Exception as e:
+                    print(f"Batch group failed: {str(e)}")
+                    for i in indices:
+                        outcomes[i] = (None, str(e))
+                    continue
+                for i in indices:
+                    result = results_by_id.get(f"doc_{i}")
+                    if result is None:
+                        outcomes[i] = (None, "No result returned for document")
+                    else:
+                        outcomes[i] = (result, None)
+        
+        return outcomes
+    
+    def save_results(self, result, metadata=None):
+        """Queue extraction results to be appended to the results file
+        
+        Accepts a single annotated document or a list of them, with a metadata
+        dict (model_id, examples_type) or a list of one per document. Each
+        document gets a unique ID for the result store. Writing happens on the
+        background result writer, so the request does not wait for disk.
+        Returns the result IDs, or an empty list if queueing failed.
+        """
+        documents = result if isinstance(result, list) else [result]
+        if not isinstance(metadata, list):
+            metadata = [metadata] * len(documents)
+        created_at = time.time()
+        records = []
+        for document, document_metadata in zip(documents, metadata):
+            document.document_id = uuid.uuid4().hex
+            records.append({**(document_metadata or {}), "created_at": created_at})
+        try:
+            self.result_writer.submit(documents, records)
+            print(f"Results queued for {self.config.RESULT_LOG_DIR}")
+            return [document.document_id for document in documents]
         except Exception as save_error:
             print(f"Warning: Could not save results to file: {save_error}")
-            return False
+            return []
     
     def serialize_extractions(self, result):
         """Convert extraction results to JSON-serializable format"""
@@ -93,25 +513,23 @@ class ExtractionService:
             print(f"Error converting result: {convert_error}")
             return [], 0
     
-    def load_saved_results(self):
-        """Load the most recently saved extraction results"""
+    def load_saved_results(self, position=-1):
+        """Load one saved extraction result, the most recent by default
+        
+        position counts records from the oldest retained result, or from the
+        end when negative. Recent results come from the active segment's offset
+        index; older ones cost at most one sealed segment.
+        """
         try:
-            if not os.path.exists(self.config.OUTPUT_FILENAME):
+            if len(self.result_log) == 0:
                 return None, "No saved results found"
             
-            # Read the last line from the JSONL file (most recent result)
-            with open(self.config.OUTPUT_FILENAME, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-                if not lines:
-                    return None, "No results in file"
-                
-                # Get the last line (most recent result)
-                last_line = lines[-1].strip()
-                if last_line:
-                    result_data = json.loads(last_line)
-                    return result_data, "Loaded from saved results"
-                else:
-                    return None, "Empty result file"
+            result_data = self.result_log.get(position)
+            if result_data is None:
+                if position == -1:
+                    return None, "No saved results found"
+                return None, f"No saved result at position {position}"
+            return result_data, "Loaded from saved results"
                     
         except Exception as e:
             return None, f"Error reading saved results: {str(e)}"
@@ -0,0 +1,75 @@
+import re
+import langextract as lx
+from report_chunker import is_header_field
+from report_examples import PharmSectionType
+
+# Header field labels mapped to the "section" attribute used by the curated examples
+SECTION_LABELS = (
+    (re.compile(r"INVESTIGATOR|SPONSOR|SITE"), "Investigator Information"),
+    (re.compile(r"IRB|ETHICS|APPROVAL"), "Approval Information"),
+    (re.compile(r"REGULATORY|DESIGNATION|IND\b|CTA\b"), "Regulatory Status"),
+    (re.compile(r"DESIGN|PHASE|TYPE|POPULATION|AGE GROUP|ANALYSIS|DURATION|ENROLLMENT"), "Study Design"),
+)
+DEFAULT_SECTION = "Protocol Summary"
+
+# Values that identify the field regardless of its label
+SECTION_VALUES = (
+    (re.compile(r"\b(?:FDA IND|EMA CTA|NDA|BLA|MAA)\b[\s#-]*\d"), "Regulatory Status"),
+    (re.compile(r"\bIRB\s*#"), "Approval Information"),
+)
+
+
+class HeaderExtractor:
+    """Rule-based extraction of the report header fields
+
+    The header is the leading run of one-line "LABEL: value" fields
+    (PROTOCOL NUMBER, STUDY TITLE, REGULATORY STATUS, IRB APPROVAL, ...).
+    Each field becomes a report_header extraction with an exact
+    char_interval, so only the text after the header needs a model call.
+    Blank lines inside the run are allowed; the first line that is not a
+    header field ends it, including labelled lines such as DOSING
+    RECOMMENDATIONS or PRIMARY ENDPOINT that belong to the body.
+    """
+
+    def extract(self, text):
+        """Return (header_extractions, body_start) for text
+
+        body_start is the offset where the model should take over; it equals
+        len(text) when the whole text is header fields.
+        """
+        extractions = []
+        body_start = 0
+        position = 0
+        for line in text.splitlines(keepends=True):
+            content = line.rstrip("\r\n")
+            if not content.strip():
+                position += len(line)
+                continue
+            if not is_header_field(content):
+                break
+            start = position + len(content) - len(content.lstrip())
+            end = position + len(content.rstrip())
+            extractions.append(lx.data.Extraction(
+                extraction_class=PharmSectionType.HEADER.value,
+                extraction_text=text[start:end],
+                char_interval=lx.data.CharInterval(start_pos=start, end_pos=end),
+                alignment_status=lx.data.AlignmentStatus.MATCH_EXACT,
+                extraction_index=len(extractions),
+                attributes={"section": self._section(content)},
+            ))
+            position += len(line)
+            body_start = position
+        if extractions and not text[body_start:].strip():
+            body_start = len(text)
+        return extractions, body_start
+
+    def _section(self, line):
+        label, value = line.split(":", 1)
+        for pattern, section in SECTION_VALUES:
+            if pattern.search(value):
+                return section
+        label = label.strip().upper()
+        for pattern, section in SECTION_LABELS:
+            if pattern.search(label):
+                return section
+        return DEFAULT_SECTION
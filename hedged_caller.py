@@ -0,0 +1,85 @@
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from config import Config
+
+
+class HedgedCaller:
+    """Calls a primary model and hedges to a backup model when it is slow
+
+    The primary call gets a deadline taken from the latency history of that
+    model (HEDGE_PERCENTILE of recent calls). If it has not answered by then,
+    the same request is sent to the configured backup model and whichever
+    finishes first wins. Python threads cannot be interrupted, so the losing
+    call is left to finish in the background and its result is discarded;
+    its latency is still recorded by the caller so deadlines keep tracking
+    reality.
+    """
+
+    def __init__(self, latency_tracker, fallbacks=None, percentile=None, max_workers=None):
+        self.latency_tracker = latency_tracker
+        self.fallbacks = fallbacks if fallbacks is not None else Config.HEDGE_FALLBACKS
+        self.percentile = percentile if percentile is not None else Config.HEDGE_PERCENTILE
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers or Config.HEDGE_WORKERS,
+            thread_name_prefix="extraction-hedge"
+        )
+        self._counters = {"calls": 0, "hedged": 0, "backup_wins": 0}
+        self._lock = threading.Lock()
+
+    def deadline(self, model_id):
+        """Seconds to wait for model_id before starting the backup call"""
+        if self.latency_tracker.count(model_id) < Config.HEDGE_MIN_SAMPLES:
+            return Config.HEDGE_DEFAULT_DEADLINE
+        return max(Config.HEDGE_MIN_DEADLINE, self.latency_tracker.percentile(model_id, self.percentile))
+
+    def call(self, call_model, model_id):
+        """Run call_model(model_id), hedging if needed
+
+        call_model returns (result, model_that_answered), which is passed
+        through from whichever call wins.
+        """
+        self._count("calls")
+        backup_id = self.fallbacks.get(model_id)
+        if not backup_id or backup_id == model_id:
+            return call_model(model_id)
+
+        primary = self._executor.submit(call_model, model_id)
+        deadline = self.deadline(model_id)
+        done, _ = wait([primary], timeout=deadline)
+        if done:
+            return primary.result()
+
+        print(f"Model {model_id} exceeded {deadline:.1f}s, hedging with {backup_id}")
+        self._count("hedged")
+        backup = self._executor.submit(call_model, backup_id)
+        pending = {primary, backup}
+
+        error = None
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                pending.discard(future)
+                if future.exception() is not None:
+                    error = future.exception()
+                    continue
+                # Ignore the loser; cancel it if it has not started yet
+                for other in pending:
+                    other.cancel()
+                if future is backup:
+                    self._count("backup_wins")
+                return future.result()
+        raise error
+
+    def _count(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def stats(self):
+        """Return hedging counters and current deadlines"""
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            "deadlines": {model_id: self.deadline(model_id) for model_id in self.fallbacks}
+        }
+
@@ -0,0 +1,117 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from config import Config
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue has no free slots"""
+
+
+class JobManager:
+    """Runs extraction jobs on a bounded background worker pool"""
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+    def __init__(self, max_workers=None, queue_depth=None, result_ttl=None):
+        self.max_workers = max_workers or Config.JOB_WORKERS
+        self.queue_depth = queue_depth if queue_depth is not None else Config.JOB_QUEUE_DEPTH
+        self.result_ttl = result_ttl if result_ttl is not None else Config.JOB_RESULT_TTL
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="extraction-job"
+        )
+        # One slot per running worker plus one per queued job
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.queue_depth)
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue a job and return its ID without waiting for it to run"""
+        if not self._slots.acquire(blocking=False):
+            raise QueueFullError(
+                f"Job queue is full ({self.max_workers} running, {self.queue_depth} queued)"
+            )
+
+        self._purge_expired()
+
+        job_id = uuid.uuid4().hex
+        job = {
+            "job_id": job_id,
+            "status": self.PENDING,
+            "submitted_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "result": None,
+            "error": None
+        }
+        with self._lock:
+            self._jobs[job_id] = job
+
+        try:
+            self._executor.submit(self._run, job, func, args, kwargs)
+        except Exception:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+            self._slots.release()
+            raise
+
+        return job_id
+
+    def get_job(self, job_id):
+        """Return a snapshot of the job record, or None if unknown"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def stats(self):
+        """Return counts of jobs by status"""
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "jobs": counts
+        }
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and release the worker threads"""
+        self._executor.shutdown(wait=wait)
+
+    def _run(self, job, func, args, kwargs):
+        """Execute a job on a worker thread and record its outcome"""
+        with self._lock:
+            job["status"] = self.RUNNING
+            job["started_at"] = time.time()
+        try:
+            result = func(*args, **kwargs)
+            with self._lock:
+                job["result"] = result
+                job["status"] = self.COMPLETED
+        except Exception as e:
+            print(f"Job {job['job_id']} failed: {str(e)}")
+            with self._lock:
+                job["error"] = str(e)
+                job["status"] = self.FAILED
+        finally:
+            with self._lock:
+                job["finished_at"] = time.time()
+            self._slots.release()
+
+    def _purge_expired(self):
+        """Drop finished jobs older than the result TTL"""
+        cutoff = time.time() - self.result_ttl
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job["finished_at"] is not None and job["finished_at"] < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
@@ -0,0 +1,50 @@
+import math
+import threading
+from collections import deque
+from config import Config
+
+
+class LatencyTracker:
+    """Sliding window of recent call latencies per model"""
+
+    def __init__(self, window=None):
+        self.window = window or Config.LATENCY_WINDOW
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def record(self, model_id, seconds):
+        """Record one completed call"""
+        with self._lock:
+            samples = self._samples.get(model_id)
+            if samples is None:
+                samples = self._samples[model_id] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def count(self, model_id):
+        """Return how many samples are held for a model"""
+        with self._lock:
+            return len(self._samples.get(model_id, ()))
+
+    def percentile(self, model_id, percent):
+        """Return the given latency percentile for a model, or None without samples"""
+        with self._lock:
+            samples = sorted(self._samples.get(model_id, ()))
+        if not samples:
+            return None
+        # Nearest-rank percentile
+        rank = max(0, min(len(samples) - 1, math.ceil(percent / 100 * len(samples)) - 1))
+        return samples[rank]
+
+    def stats(self):
+        """Return sample count and p50/p95/p99 per model"""
+        with self._lock:
+            models = list(self._samples)
+        return {
+            model_id: {
+                "samples": self.count(model_id),
+                "p50": self.percentile(model_id, 50),
+                "p95": self.percentile(model_id, 95),
+                "p99": self.percentile(model_id, 99)
+            }
+            for model_id in models
+        }
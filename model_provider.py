@@ -0,0 +1,207 @@
+import random
+import re
+import threading
+import time
+import httpx
+import langextract as lx
+from config import Config
+from report_examples import get_examples_for_model
+
+
+class ProviderClientPool:
+    """Long-lived pooled HTTP clients, one per model, shared by all requests
+
+    lx.extract builds a new provider client on every call, which would open
+    fresh connections (and TLS handshakes) each time. Gemini providers accept
+    a ready-made httpx client through http_options, so each model gets one
+    keep-alive client created on first use and reused across requests and
+    threads (httpx clients are thread-safe). Other providers do not accept
+    an external client and are left unpooled.
+    """
+
+    def __init__(self, pool_size=None, pool_sizes=None, keepalive_expiry=None):
+        self.pool_size = pool_size or Config.PROVIDER_POOL_SIZE
+        self.pool_sizes = pool_sizes if pool_sizes is not None else Config.PROVIDER_POOL_SIZES
+        self.keepalive_expiry = keepalive_expiry if keepalive_expiry is not None else Config.PROVIDER_KEEPALIVE_EXPIRY
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def supports(self, model_id):
+        return model_id.startswith("gemini")
+
+    def client(self, model_id):
+        """Return the shared httpx client for a model, creating it on first use"""
+        with self._lock:
+            client = self._clients.get(model_id)
+            if client is None:
+                size = self.pool_sizes.get(model_id, self.pool_size)
+                client = self._clients[model_id] = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=size,
+                        max_keepalive_connections=size,
+                        keepalive_expiry=self.keepalive_expiry
+                    ),
+                    follow_redirects=True
+                )
+            return client
+
+    def language_model_params(self, model_id):
+        """Provider constructor kwargs that route a model's requests through its pool"""
+        if not self.supports(model_id):
+            return {}
+        from google.genai import types as genai_types
+        return {"http_options": genai_types.HttpOptions(httpx_client=self.client(model_id))}
+
+    def stats(self):
+        """Return the pool size of every model with an open client"""
+        with self._lock:
+            models = list(self._clients)
+        return {
+            model_id: {
+                "pool_size": self.pool_sizes.get(model_id, self.pool_size),
+                "keepalive_expiry": self.keepalive_expiry
+            }
+            for model_id in models
+        }
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
+
+
+class LangExtractProvider:
+    """Sends extraction requests to the real model API through lx.extract"""
+
+    name = "langextract"
+    requires_api_key = True
+
+    def __init__(self):
+        self.clients = ProviderClientPool()
+
+    def extract(self, **kwargs):
+        params = self.clients.language_model_params(kwargs.get("model_id") or "")
+        if params:
+            kwargs["language_model_params"] = {**params, **(kwargs.get("language_model_params") or {})}
+        return lx.extract(**kwargs)
+
+    def stats(self):
+        return {"connection_pools": self.clients.stats()}
+
+
+class FakeProviderError(Exception):
+    """Simulated transient provider failure"""
+
+    status_code = 503
+
+
+class FakeProvider:
+    """Deterministic offline stand-in for the model API
+
+    Extractions are found by matching the extraction texts of the curated
+    report examples (and of any examples passed in) against the input, so
+    every result carries an exact char_interval into the submitted text.
+    Each call sleeps for a latency drawn from the configured distribution
+    and fails with a retryable 503 at error_rate. A fixed seed makes runs
+    repeatable.
+    """
+
+    name = "fake"
+    requires_api_key = False
+
+    def __init__(self, latency_ms=None, latency_distribution=None, latency_sigma=None,
+                 error_rate=None, seed=None):
+        self.latency_ms = latency_ms if latency_ms is not None else Config.FAKE_LATENCY_MS
+        self.latency_distribution = latency_distribution or Config.FAKE_LATENCY_DISTRIBUTION
+        self.latency_sigma = latency_sigma if latency_sigma is not None else Config.FAKE_LATENCY_SIGMA
+        self.error_rate = error_rate if error_rate is not None else Config.FAKE_ERROR_RATE
+        self._random = random.Random(seed if seed is not None else Config.FAKE_SEED)
+        self._lock = threading.Lock()
+        self._vocabulary = {}
+        self._pattern = None
+        self._learn(get_examples_for_model())
+
+    def extract(self, text_or_documents, prompt_description=None, examples=None, model_id=None, **kwargs):
+        """Same call shape as lx.extract: one text or an iterable of lx.data.Document"""
+        delay, fail = self._draw()
+        time.sleep(delay)
+        if fail:
+            raise FakeProviderError(f"Simulated provider error from {model_id}: 503 Service Unavailable")
+
+        pattern = self._pattern_for(examples or [])
+        if isinstance(text_or_documents, str):
+            return self._annotate(text_or_documents, pattern)
+        return [
+            self._annotate(document.text, pattern, document.document_id)
+            for document in text_or_documents
+        ]
+
+    def stats(self):
+        return {
+            "latency_ms": self.latency_ms,
+            "latency_distribution": self.latency_distribution,
+            "error_rate": self.error_rate
+        }
+
+    def _draw(self):
+        """Return (latency in seconds, whether this call fails)"""
+        with self._lock:
+            if self.latency_distribution == "fixed":
+                latency_ms = self.latency_ms
+            elif self.latency_distribution == "uniform":
+                latency_ms = self._random.uniform(0, 2 * self.latency_ms)
+            elif self.latency_distribution == "lognormal":
+                # latency_ms is the median; sigma controls the tail
+                latency_ms = self.latency_ms * self._random.lognormvariate(0, self.latency_sigma)
+            else:
+                raise ValueError(f"Unknown fake latency distribution: {self.latency_distribution}")
+            fail = self._random.random() < self.error_rate
+        return latency_ms / 1000, fail
+
+    def _learn(self, examples):
+        """Add the extractions of some examples to the known vocabulary"""
+        learned = False
+        for example in examples:
+            for extraction in example.extractions:
+                key = extraction.extraction_text.lower()
+                if key.strip() and key not in self._vocabulary:
+                    self._vocabulary[key] = (extraction.extraction_class, extraction.attributes)
+                    learned = True
+        return learned
+
+    def _pattern_for(self, examples):
+        """Return a regex matching every known extraction text, longest first"""
+        with self._lock:
+            if self._learn(examples) or self._pattern is None:
+                texts = sorted(self._vocabulary, key=len, reverse=True)
+                self._pattern = re.compile("|".join(re.escape(text) for text in texts), re.I)
+            return self._pattern
+
+    def _annotate(self, text, pattern, document_id=None):
+        extractions = []
+        for index, match in enumerate(pattern.finditer(text)):
+            extraction_class, attributes = self._vocabulary[match.group().lower()]
+            extractions.append(lx.data.Extraction(
+                extraction_class=extraction_class,
+                extraction_text=match.group(),
+                char_interval=lx.data.CharInterval(start_pos=match.start(), end_pos=match.end()),
+                alignment_status=lx.data.AlignmentStatus.MATCH_EXACT,
+                extraction_index=index,
+                attributes=dict(attributes) if attributes else None,
+            ))
+        return lx.data.AnnotatedDocument(text=text, extractions=extractions, document_id=document_id)
+
+
+PROVIDERS = {
+    LangExtractProvider.name: LangExtractProvider,
+    FakeProvider.name: FakeProvider,
+}
+
+
+def create_provider(name=None):
+    """Build the model provider named in Config.MODEL_PROVIDER"""
+    name = name or Config.MODEL_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown model provider: {name}. Choose one of: {', '.join(PROVIDERS)}")
+    return PROVIDERS[name]()
@@ -0,0 +1,65 @@
+import re
+from config import Config
+from report_chunker import LABEL_LINE
+
+AUTO_MODEL = "auto"
+
+# Statistical results (HR=0.68, 95% CI, p<0.001, ...) make analysis sections harder to label
+STATISTIC = re.compile(r"\b(?:HR|OR|RR|CI|AUC|Cmax|p)\s*[=<>]|\b\d+(?:\.\d+)?%\s*CI\b", re.I)
+
+
+class ModelRouter:
+    """Chooses a model for requests that ask for model_id "auto"
+
+    Short, simply structured inputs go to the fast model; long inputs, inputs
+    with many labelled sections or dense statistical results go to the strong
+    model. If the strong model's recent p95 latency is above
+    ROUTER_STRONG_MAX_P95, complex inputs are sent to the fast model too.
+    """
+
+    def __init__(self, latency_tracker, token_budget):
+        self.latency_tracker = latency_tracker
+        self.token_budget = token_budget
+        self.fast_model = Config.ROUTER_FAST_MODEL
+        self.strong_model = Config.ROUTER_STRONG_MODEL
+
+    def route(self, input_text):
+        """Return (model_id, decision) where decision records the signals used"""
+        signals = self.signals(input_text)
+        reasons = []
+        if signals["characters"] > Config.ROUTER_FAST_MAX_CHARS:
+            reasons.append("long input")
+        if signals["estimated_tokens"] > Config.ROUTER_FAST_MAX_TOKENS:
+            reasons.append("many tokens")
+        if signals["sections"] > Config.ROUTER_FAST_MAX_SECTIONS:
+            reasons.append("many sections")
+        if signals["statistics"] > Config.ROUTER_FAST_MAX_STATISTICS:
+            reasons.append("dense statistics")
+
+        model_id = self.strong_model if reasons else self.fast_model
+        if reasons and self._strong_model_slow():
+            reasons.append(f"{self.strong_model} p95 above {Config.ROUTER_STRONG_MAX_P95:g}s")
+            model_id = self.fast_model
+
+        decision = {
+            "model": model_id,
+            "reasons": reasons or ["short, simple input"],
+            **signals
+        }
+        return model_id, decision
+
+    def signals(self, input_text):
+        """Measure the input features the routing rules look at"""
+        return {
+            "characters": len(input_text),
+            "estimated_tokens": self.token_budget.estimate(input_text),
+            "sections": sum(1 for line in input_text.splitlines() if LABEL_LINE.match(line)),
+            "statistics": len(STATISTIC.findall(input_text)),
+        }
+
+    def _strong_model_slow(self):
+        if Config.ROUTER_STRONG_MAX_P95 <= 0:
+            return False
+        if self.latency_tracker.count(self.strong_model) < Config.ROUTER_MIN_SAMPLES:
+            return False
+        return self.latency_tracker.percentile(self.strong_model, 95) > Config.ROUTER_STRONG_MAX_P95
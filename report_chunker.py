@@ -0,0 +1,131 @@
+import re
+from dataclasses import dataclass
+from config import Config
+from report_examples import PharmSectionType
+
+# "PROTOCOL NUMBER: ...", "IRB APPROVAL: ...", "EFFICACY ANALYSIS:" and similar
+LABEL_LINE = re.compile(r"^[ \t]*[A-Z][A-Z0-9 #/&(),'.-]{1,60}:")
+BLOCK = re.compile(r"\S(?:.*?\S)?(?=\n[ \t]*\n|\s*\Z)", re.S)
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+RECOMMENDATION_HEADINGS = re.compile(
+    r"DOSING|DOSE|RECOMMENDATION|CONTRAINDICATION|ADMINISTRATION|PATIENT SELECTION|MONITORING|GUIDANCE"
+)
+FOOTER_HEADINGS = re.compile(
+    r"REGULATORY COMPLIANCE|COMPLIANCE|APPROVAL STATUS|EXCLUSIVITY|DISCLAIMER|POST-MARKETING|MANUFACTURING"
+)
+# Labelled lines that report findings rather than describe the study
+RESULT_HEADINGS = re.compile(
+    r"ENDPOINT|RESULT|EFFICACY|SAFETY|ADVERSE|OUTCOME|CONCLUSION|FINDING|RESPONSE|PHARMACOKINETIC"
+)
+
+
+def is_header_field(line):
+    """True for a one-line "LABEL: value" field that belongs to the report header
+
+    Labels that open recommendations, the regulatory footer or reported
+    findings are body text even when they sit at the top of a report.
+    """
+    if not LABEL_LINE.match(line):
+        return False
+    label, value = line.split(":", 1)
+    if not value.strip():
+        return False
+    label = label.strip().upper()
+    return not any(pattern.search(label) for pattern in (FOOTER_HEADINGS, RECOMMENDATION_HEADINGS, RESULT_HEADINGS))
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A span of the original report sent to the model on its own"""
+
+    start: int
+    end: int
+    text: str
+    kind: str
+
+
+class ReportChunker:
+    """Splits pharmaceutical reports along their section structure
+
+    Blocks are separated by blank lines and labelled with the section they
+    most likely belong to (header fields, analysis paragraphs, recommendations
+    or the regulatory footer). Neighbouring blocks are packed together while
+    the chunk stays within target_chars, one model call's worth of text
+    (MAX_CHAR_BUFFER unless CHUNK_TARGET_CHARS is set); oversized blocks are
+    cut at sentence boundaries to stay under max_chars. Chunks that begin where a long block was cut start overlap
+    characters early so entities spanning the cut are seen whole; chunks that
+    begin at a blank line need no overlap.
+    """
+
+    def __init__(self, target_chars=None, max_chars=None, overlap=None):
+        if target_chars is None:
+            target_chars = Config.CHUNK_TARGET_CHARS or Config.MAX_CHAR_BUFFER
+        self.target_chars = target_chars
+        self.max_chars = max_chars if max_chars is not None else Config.CHUNK_MAX_CHARS
+        self.overlap = overlap if overlap is not None else Config.CHUNK_OVERLAP_CHARS
+
+    def split(self, text):
+        """Return the chunks covering text, in document order"""
+        blocks = []
+        seen_body = False
+        for match in BLOCK.finditer(text):
+            kind = self._classify(match.group(), seen_body)
+            seen_body = seen_body or kind != PharmSectionType.HEADER.value
+            pieces = self._split_long(text, match.start(), match.end())
+            for index, (start, end) in enumerate(pieces):
+                blocks.append((start, end, kind, index > 0))
+
+        chunks = []
+        current = None
+        for start, end, kind, is_cut in blocks:
+            if current is not None:
+                if end - current[0] <= min(self.target_chars, self.max_chars):
+                    current = (current[0], end, current[2], current[3])
+                    continue
+                chunks.append(current)
+            current = (start, end, kind, is_cut)
+        if current is not None:
+            chunks.append(current)
+
+        return [self._make_chunk(text, *chunk) for chunk in chunks]
+
+    def _make_chunk(self, text, start, end, kind, is_cut):
+        if self.overlap > 0 and is_cut:
+            overlap_start = max(0, start - self.overlap)
+            # Snap to a word boundary so the overlap does not begin mid-token
+            space = text.find(" ", overlap_start, start)
+            newline = text.find("\n", overlap_start, start)
+            candidates = [p + 1 for p in (space, newline) if p != -1]
+            start = min(candidates) if candidates else start
+        return Chunk(start=start, end=end, text=text[start:end], kind=kind)
+
+    def _classify(self, block, seen_body):
+        """Guess the section type of a blank-line separated block"""
+        lines = [line for line in block.splitlines() if line.strip()]
+        heading = lines[0].split(":", 1)[0].upper() if LABEL_LINE.match(lines[0]) else ""
+
+        if heading and FOOTER_HEADINGS.search(heading):
+            return PharmSectionType.FOOTER.value
+        if heading and RECOMMENDATION_HEADINGS.search(heading):
+            return PharmSectionType.RECOMMENDATIONS.value
+        # A run of one-line "LABEL: value" fields before any body text is header metadata
+        if not seen_body and all(is_header_field(line) for line in lines):
+            return PharmSectionType.HEADER.value
+        return PharmSectionType.ANALYSIS.value
+
+    def _split_long(self, text, start, end):
+        """Cut a block longer than max_chars at sentence boundaries"""
+        if end - start <= self.max_chars:
+            return [(start, end)]
+
+        pieces = []
+        piece_start = start
+        last_break = None
+        for match in SENTENCE_END.finditer(text, start, end):
+            if match.start() - piece_start > self.max_chars and last_break is not None:
+                pieces.append((piece_start, last_break[0]))
+                piece_start = last_break[1]
+            last_break = (match.start(), match.end())
+        pieces.append((piece_start, end))
+        return pieces
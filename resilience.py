@@ -0,0 +1,162 @@
+import random
+import threading
+import time
+from config import Config
+
+RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+RETRYABLE_MESSAGES = (
+    "rate limit", "resource exhausted", "resource_exhausted", "quota", "unavailable",
+    "overloaded", "deadline exceeded", "timed out", "timeout", "temporarily",
+    "connection reset", "connection aborted", "try again",
+)
+
+
+class ProviderUnavailableError(Exception):
+    """Raised when a model provider keeps failing with transient errors"""
+
+
+class CircuitOpenError(ProviderUnavailableError):
+    """Raised when a model's circuit is open and no fallback is available"""
+
+
+def is_retryable(error):
+    """Classify an exception as a transient provider error worth retrying"""
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return True
+    if isinstance(error, (ValueError, TypeError, KeyError)):
+        return False
+    for attribute in ("status_code", "code", "status"):
+        status = getattr(error, attribute, None)
+        status = getattr(status, "value", status)
+        if isinstance(status, int) and status in RETRYABLE_STATUS_CODES:
+            return True
+    message = str(error).lower()
+    if any(str(code) in message for code in RETRYABLE_STATUS_CODES) and "error" in message:
+        return True
+    return any(fragment in message for fragment in RETRYABLE_MESSAGES)
+
+
+class CircuitBreaker:
+    """Closed/open/half-open breaker for one model
+
+    After failure_threshold consecutive transient failures the circuit opens
+    and calls are rejected immediately. Once reset_timeout has passed a single
+    trial call is let through; success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=None, reset_timeout=None):
+        self.failure_threshold = failure_threshold or Config.BREAKER_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout if reset_timeout is not None else Config.BREAKER_RESET_TIMEOUT
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Return True if a call may go through now"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release(self):
+        """Free a half-open trial slot after a call that proved nothing either way"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def snapshot(self):
+        with self._lock:
+            return {"state": self.state, "consecutive_failures": self.failures}
+
+
+class ResilientCaller:
+    """Retries transient failures and guards each model with a circuit breaker
+
+    Transient errors are retried up to max_attempts times with exponential
+    backoff and full jitter. Fatal errors (bad input, configuration) are
+    raised at once and do not count against the circuit. When a model's
+    circuit is open, calls go to its fallback model if that circuit is
+    closed, and otherwise fail fast with CircuitOpenError.
+    """
+
+    def __init__(self, fallbacks=None, max_attempts=None, base_delay=None, max_delay=None):
+        self.fallbacks = fallbacks if fallbacks is not None else Config.HEDGE_FALLBACKS
+        self.max_attempts = max_attempts or Config.RETRY_MAX_ATTEMPTS
+        self.base_delay = base_delay if base_delay is not None else Config.RETRY_BASE_DELAY
+        self.max_delay = max_delay if max_delay is not None else Config.RETRY_MAX_DELAY
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, model_id):
+        """Return the circuit breaker for a model, creating it on first use"""
+        with self._lock:
+            breaker = self._breakers.get(model_id)
+            if breaker is None:
+                breaker = self._breakers[model_id] = CircuitBreaker()
+            return breaker
+
+    def call(self, call_model, model_id, allow_fallback=True):
+        """Run call_model(model_id) with retries and circuit breaking
+
+        Returns (result, model_that_answered).
+        """
+        target = model_id
+        if not self.breaker(model_id).allow():
+            fallback = self.fallbacks.get(model_id) if allow_fallback else None
+            if not fallback or not self.breaker(fallback).allow():
+                raise CircuitOpenError(
+                    f"Model {model_id} is temporarily unavailable (circuit open); please retry later."
+                )
+            print(f"Circuit open for {model_id}, routing to {fallback}")
+            target = fallback
+
+        breaker = self.breaker(target)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                result = call_model(target)
+            except Exception as e:
+                if not is_retryable(e):
+                    breaker.release()
+                    raise
+                breaker.record_failure()
+                if attempt == self.max_attempts or not breaker.allow():
+                    raise ProviderUnavailableError(
+                        f"Model {target} failed after {attempt} attempts: {str(e)}"
+                    ) from e
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                print(f"Transient error from {target} (attempt {attempt}): {str(e)}; retrying in {delay:.2f}s")
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            return result, target
+
+    def stats(self):
+        """Return the circuit state of every model seen so far"""
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {model_id: breaker.snapshot() for model_id, breaker in breakers.items()}
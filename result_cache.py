@@ -0,0 +1,215 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from langextract import data_lib
+from config import Config
+
+
+class ResultCache:
+    """Two-tier cache of extraction results keyed by request content
+
+    Results live in a bounded in-memory LRU backed by a directory of JSON
+    files, so repeat submissions are served without calling the model even
+    after a restart. Both tiers honour a TTL; the disk tier is also capped
+    by total size and evicts least recently used files first.
+    """
+
+    def __init__(self, max_entries=None, cache_dir=None, ttl=None, max_disk_bytes=None):
+        self.max_entries = max_entries if max_entries is not None else Config.CACHE_MAX_ENTRIES
+        self.cache_dir = cache_dir if cache_dir is not None else Config.CACHE_DIR
+        self.ttl = ttl if ttl is not None else Config.CACHE_TTL
+        self.max_disk_bytes = max_disk_bytes if max_disk_bytes is not None else Config.CACHE_MAX_DISK_BYTES
+
+        self._memory = OrderedDict()  # key -> (expires_at, result)
+        self._disk = OrderedDict()    # key -> file size, least recently used first
+        self._disk_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "evictions": 0,
+            "expirations": 0
+        }
+
+        if self.cache_dir:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._load_disk_index()
+
+    @staticmethod
+    def make_key(*parts):
+        """Build a content hash from the given request parts"""
+        digest = hashlib.sha256()
+        for part in parts:
+            encoded = part.encode("utf-8") if isinstance(part, str) else repr(part).encode("utf-8")
+            # Length prefix keeps ("ab", "c") and ("a", "bc") distinct
+            digest.update(f"{len(encoded)}:".encode("ascii"))
+            digest.update(encoded)
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return a copy of the cached result for key, or None
+
+        The lock covers only the in-memory tier and the disk index; reading
+        and parsing a disk entry happens outside it.
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                result = entry[1]
+            else:
+                result = None
+                if entry is not None:
+                    del self._memory[key]
+                    self._counters["expirations"] += 1
+                if not self.cache_dir or key not in self._disk:
+                    self._counters["misses"] += 1
+                    return None
+        if result is not None:
+            # Cached results are never mutated, so the copy can be taken without the lock
+            return copy.deepcopy(result)
+
+        result, expired = self._read_disk(key, now)
+        with self._lock:
+            if result is None:
+                stale = self._forget_disk(key)
+                self._counters["misses"] += 1
+                if expired:
+                    self._counters["expirations"] += 1
+            else:
+                stale = []
+                if key in self._disk:
+                    self._disk.move_to_end(key)
+                self._counters["disk_hits"] += 1
+                self._store_memory(key, result, now + self.ttl)
+        self._remove_files(stale)
+        return copy.deepcopy(result) if result is not None else None
+
+    def put(self, key, result):
+        """Store a result in both tiers
+
+        The entry is serialized and written outside the lock, which is then
+        held only to update the memory tier and the disk index.
+        """
+        now = time.time()
+        stored = copy.deepcopy(result)
+        size = self._write_disk(key, result, now)
+        with self._lock:
+            self._store_memory(key, stored, now + self.ttl)
+            stale = []
+            if size is not None:
+                self._disk_bytes -= self._disk.pop(key, 0)
+                self._disk[key] = size
+                self._disk_bytes += size
+                while self._disk_bytes > self.max_disk_bytes and len(self._disk) > 1:
+                    stale += self._forget_disk(next(iter(self._disk)))
+                    self._counters["evictions"] += 1
+            self._counters["stores"] += 1
+        self._remove_files(stale)
+
+    def clear(self):
+        """Drop every cached entry from memory and disk"""
+        with self._lock:
+            self._memory.clear()
+            stale = [path for key in list(self._disk) for path in self._forget_disk(key)]
+        self._remove_files(stale)
+
+    def stats(self):
+        """Return hit/miss counters and current tier sizes"""
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk),
+                "disk_bytes": self._disk_bytes
+            }
+
+    def _store_memory(self, key, result, expires_at):
+        self._memory[key] = (expires_at, result)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def _load_disk_index(self):
+        """Index existing cache files, oldest first, so eviction order survives restarts"""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+            self._disk_bytes += size
+
+    def _read_disk(self, key, now):
+        """Return (result, expired) for a disk entry; result is None when unusable"""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            # Evicted by another thread between the index check and the read
+            return None, False
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not read cache entry {key}: {e}")
+            return None, False
+
+        if entry.get("created_at", 0) + self.ttl <= now:
+            return None, True
+        return data_lib.dict_to_annotated_document(entry["result"]), False
+
+    def _write_disk(self, key, result, now):
+        """Write an entry file and return its size, or None if it was not written"""
+        if not self.cache_dir:
+            return None
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            entry = {
+                "created_at": now,
+                "result": data_lib.annotated_document_to_dict(result)
+            }
+            data = json.dumps(entry, ensure_ascii=False).encode("utf-8")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+            return len(data)
+        except (OSError, TypeError, ValueError) as e:
+            print(f"Warning: Could not write cache entry {key}: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+
+    def _forget_disk(self, key):
+        """Drop key from the disk index under the lock; return the file to delete after it"""
+        if key not in self._disk:
+            return []
+        self._disk_bytes -= self._disk.pop(key)
+        return [self._path(key)]
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
@@ -0,0 +1,188 @@
+"""Columnar export of stored extractions for analytics.
+
+Flattens the SQLite result store into Parquet files with one row per
+extraction. extraction_class, alignment_status, model_id, examples_type and
+every attribute column (attr_<key>) are dictionary encoded, so they load as
+categoricals and a column scan never parses a JSON document. Each run exports
+only the extractions stored since the previous run:
+
+    python result_export.py                  # new extractions into EXPORT_DIR
+    python result_export.py --full           # rewrite the export from scratch
+
+Load every part as one table, reading only the columns you need:
+
+    from result_export import load_export
+    table = load_export(columns=["extraction_class", "attr_section"])
+"""
+
+import argparse
+import glob
+import json
+import os
+import sqlite3
+import time
+import pyarrow as pa
+import pyarrow.parquet as pq
+from config import Config
+
+STATE_FILE = "export_state.json"
+PART_PATTERN = "extractions-*.parquet"
+ATTRIBUTE_PREFIX = "attr_"
+
+BASE_SCHEMA = pa.schema([
+    ("extraction_id", pa.int64()),
+    ("result_id", pa.string()),
+    ("created_at", pa.float64()),
+    ("model_id", pa.dictionary(pa.int32(), pa.string())),
+    ("examples_type", pa.dictionary(pa.int32(), pa.string())),
+    ("position", pa.int32()),
+    ("extraction_class", pa.dictionary(pa.int32(), pa.string())),
+    ("extraction_text", pa.string()),
+    ("start_pos", pa.int64()),
+    ("end_pos", pa.int64()),
+    ("alignment_status", pa.dictionary(pa.int32(), pa.string())),
+])
+
+
+class ResultExporter:
+    """Exports extractions from the result store to Parquet, incrementally
+
+    The high-water mark is the largest extraction row id already exported,
+    kept in export_state.json beside the parts. A run reads one SQLite
+    snapshot, so rows committed while it runs wait for the next export. The
+    part is written to a temporary name and renamed before the state is
+    updated; a run interrupted in between rewrites the same part next time.
+    """
+
+    def __init__(self, db_path=None, directory=None, batch_rows=None, compression=None):
+        self.db_path = db_path or Config.RESULT_DB_PATH
+        self.directory = directory or Config.EXPORT_DIR
+        self.batch_rows = batch_rows or Config.EXPORT_BATCH_ROWS
+        self.compression = compression or Config.EXPORT_COMPRESSION
+        self.state_path = os.path.join(self.directory, STATE_FILE)
+
+    def export(self, full=False):
+        """Write extractions stored since the last run to a new part; return a summary"""
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(f"Result store not found: {self.db_path}")
+        os.makedirs(self.directory, exist_ok=True)
+        state = self._load_state()
+        if full:
+            for path in glob.glob(os.path.join(self.directory, PART_PATTERN)):
+                os.remove(path)
+            state = {"last_extraction_id": 0, "parts": []}
+
+        start_id = state["last_extraction_id"]
+        connection = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        try:
+            # One read transaction: every query below sees the same snapshot
+            connection.execute("BEGIN")
+            end_id = connection.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM extractions"
+            ).fetchone()[0]
+            if end_id <= start_id:
+                return {"file": None, "rows": 0, "from_id": start_id, "to_id": start_id}
+            attribute_keys = [row[0] for row in connection.execute(
+                "SELECT DISTINCT key FROM attributes WHERE extraction_id > ? AND extraction_id <= ? ORDER BY key",
+                (start_id, end_id)
+            )]
+            schema = pa.schema(list(BASE_SCHEMA) + [
+                pa.field(ATTRIBUTE_PREFIX + key, pa.dictionary(pa.int32(), pa.string()))
+                for key in attribute_keys
+            ])
+
+            name = f"extractions-{start_id + 1:012d}-{end_id:012d}.parquet"
+            path = os.path.join(self.directory, name)
+            rows = 0
+            with pq.ParquetWriter(path + ".tmp", schema, compression=self.compression) as writer:
+                for batch in self._batches(connection, start_id, end_id, attribute_keys):
+                    writer.write_table(pa.Table.from_pydict(batch, schema=schema))
+                    rows += len(batch["extraction_id"])
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+        os.replace(path + ".tmp", path)
+        state["last_extraction_id"] = end_id
+        state["parts"].append({"file": name, "rows": rows, "from_id": start_id + 1, "to_id": end_id,
+                               "exported_at": time.time()})
+        self._write_state(state)
+        print(f"Exported {rows} extractions to {path}")
+        return {"file": path, "rows": rows, "from_id": start_id + 1, "to_id": end_id}
+
+    def _batches(self, connection, start_id, end_id, attribute_keys):
+        """Yield column dicts of at most batch_rows extractions in id order"""
+        last_id = start_id
+        while last_id < end_id:
+            rows = connection.execute(
+                "SELECT e.id, e.result_id, r.created_at, r.model_id, r.examples_type, e.position, "
+                "e.extraction_class, e.extraction_text, e.start_pos, e.end_pos, e.alignment_status "
+                "FROM extractions e JOIN results r ON r.id = e.result_id "
+                "WHERE e.id > ? AND e.id <= ? ORDER BY e.id LIMIT ?",
+                (last_id, end_id, self.batch_rows)
+            ).fetchall()
+            if not rows:
+                return
+            batch_end = rows[-1][0]
+            attributes = {}
+            for extraction_id, key, value in connection.execute(
+                "SELECT extraction_id, key, value FROM attributes WHERE extraction_id > ? AND extraction_id <= ?",
+                (last_id, batch_end)
+            ):
+                attributes.setdefault(extraction_id, {})[key] = value
+
+            columns = {name: [] for name in BASE_SCHEMA.names}
+            for row in rows:
+                for name, value in zip(BASE_SCHEMA.names, row):
+                    columns[name].append(value)
+            for key in attribute_keys:
+                columns[ATTRIBUTE_PREFIX + key] = [attributes.get(row[0], {}).get(key) for row in rows]
+            yield columns
+            last_id = batch_end
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {"last_extraction_id": 0, "parts": []}
+        with open(self.state_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_state(self, state):
+        temp_path = self.state_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f, indent=2)
+        os.replace(temp_path, self.state_path)
+
+
+def load_export(directory=None, columns=None):
+    """Read every exported part into one pyarrow Table
+
+    Parts written before a new attribute key appeared get null in that
+    column. columns limits the read to the named columns.
+    """
+    directory = directory or Config.EXPORT_DIR
+    tables = []
+    for path in sorted(glob.glob(os.path.join(directory, PART_PATTERN))):
+        names = pq.read_schema(path).names
+        tables.append(pq.read_table(path, columns=[c for c in columns if c in names] if columns else None))
+    if not tables:
+        return pa.table({})
+    return pa.concat_tables(tables, promote_options="default")
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Export stored extractions to Parquet")
+    parser.add_argument("--db", default=None, help="result store path (default RESULT_DB_PATH)")
+    parser.add_argument("--output", default=None, help="export directory (default EXPORT_DIR)")
+    parser.add_argument("--full", action="store_true", help="discard earlier parts and export everything")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    summary = ResultExporter(db_path=args.db, directory=args.output).export(full=args.full)
+    if summary["file"] is None:
+        print(f"No new extractions since extraction id {summary['to_id']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,630 @@
+import array
+import gzip
+import json
+import mmap
+import os
+import shutil
+import struct
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from config import Config
+
+# One little-endian uint64 byte offset per record
+OFFSET = struct.Struct("<Q")
+MANIFEST = "manifest.json"
+# Offsets buffered per index write while indexing an existing file
+INDEX_CHUNK = 65536
+
+
+class LogSegment:
+    """Append-only JSONL file with a sidecar offset index
+
+    Every append also appends the byte offset of each new line to
+    "<path>.idx", so the latest record or record N is found with one seek
+    into the index and one into the data file, whatever the file size.
+    Records appended without the index (older versions, other tools) are
+    picked up by scanning only the unindexed tail; a missing or truncated
+    index is rebuilt by one streaming pass. With several processes
+    appending, record order in the index follows index writes, which can
+    differ slightly from data order.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index_path = self.path + ".idx"
+        # Reentrant: opening for append refreshes the index under the same lock
+        self._lock = threading.RLock()
+        self._data_fd = None
+        self._index_fd = None
+
+    def append(self, lines):
+        """Append complete lines (each ending in a newline) with one write"""
+        payload = "".join(lines).encode("utf-8")
+        with self._lock:
+            if self._data_fd is None:
+                self._open_for_append()
+            written = 0
+            while written < len(payload):
+                written += os.write(self._data_fd, payload[written:])
+            # O_APPEND leaves the descriptor at the end of this write
+            start = os.lseek(self._data_fd, 0, os.SEEK_CUR) - len(payload)
+            offsets = []
+            for line in lines:
+                offsets.append(OFFSET.pack(start))
+                start += len(line.encode("utf-8"))
+            os.write(self._index_fd, b"".join(offsets))
+
+    def sync(self):
+        """fsync the data file and its index"""
+        with self._lock:
+            if self._data_fd is not None:
+                os.fsync(self._data_fd)
+                os.fsync(self._index_fd)
+
+    def close(self):
+        with self._lock:
+            for fd in (self._data_fd, self._index_fd):
+                if fd is not None:
+                    os.close(fd)
+            self._data_fd = self._index_fd = None
+
+    def size(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def __len__(self):
+        return self._refresh_index()
+
+    def get(self, position):
+        """Return record number position (negative counts from the end), or None"""
+        count = self._refresh_index()
+        if position < 0:
+            position += count
+        if not 0 <= position < count:
+            return None
+        with open(self.index_path, "rb") as index:
+            index.seek(position * OFFSET.size)
+            (offset,) = OFFSET.unpack(index.read(OFFSET.size))
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            line = f.readline()
+        return json.loads(line) if line.strip() else None
+
+    def _open_for_append(self):
+        self._refresh_index()
+        self._data_fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        self._index_fd = os.open(self.index_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+
+    def _refresh_index(self):
+        """Bring the index up to date with the data file and return the record count"""
+        # Under the lock, so an append cannot land between measuring and fixing the index
+        with self._lock:
+            if not os.path.exists(self.path):
+                return 0
+            data_size = os.path.getsize(self.path)
+            index_size = os.path.getsize(self.index_path) if os.path.exists(self.index_path) else 0
+            count, indexed_end = self.indexed_prefix(self.path, self.index_path)
+            if indexed_end == data_size and index_size == count * OFFSET.size:
+                return count
+            return self._index_tail(count, indexed_end)
+
+    @classmethod
+    def indexed_prefix(cls, path, index_path):
+        """Return (count, end) for the complete entries of an index, without writing
+
+        end is the data offset just past the last indexed line. An index whose
+        last entry does not point at a line in the data file is treated as
+        empty.
+        """
+        index_size = os.path.getsize(index_path) if os.path.exists(index_path) else 0
+        count = index_size // OFFSET.size
+        if not count:
+            return 0, 0
+        data_size = os.path.getsize(path)
+        with open(index_path, "rb") as index, open(path, "rb") as f:
+            index.seek((count - 1) * OFFSET.size)
+            (offset,) = OFFSET.unpack(index.read(OFFSET.size))
+            if offset < data_size and cls._starts_line(f, offset):
+                f.seek(offset)
+                line = f.readline()
+                if line.endswith(b"\n"):
+                    return count, offset + len(line)
+        # Data file was replaced or truncated under the index
+        return 0, 0
+
+    def _index_tail(self, count, start):
+        """Append offsets for every complete line from start onwards"""
+        with self._lock:
+            offsets = array.array("Q")
+            with open(self.path, "rb") as f, \
+                    open(self.index_path, "r+b" if os.path.exists(self.index_path) else "wb") as index:
+                index.truncate(count * OFFSET.size)
+                index.seek(count * OFFSET.size)
+                f.seek(start)
+                position = start
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break  # partial last line, still being written
+                    if line.strip():
+                        offsets.append(position)
+                    position += len(line)
+                    if len(offsets) >= INDEX_CHUNK:
+                        count += self._write_offsets(index, offsets)
+                count += self._write_offsets(index, offsets)
+            return count
+
+    @staticmethod
+    def _write_offsets(index, offsets):
+        """Write buffered offsets in index byte order and clear the buffer"""
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        index.write(offsets.tobytes())
+        written = len(offsets)
+        del offsets[:]
+        return written
+
+    @staticmethod
+    def _starts_line(f, offset):
+        if offset == 0:
+            return True
+        f.seek(offset - 1)
+        return f.read(1) == b"\n"
+
+
+class ResultReader(Sequence):
+    """Memory-mapped, read-only random access to a JSONL results file
+
+    Supports len(), reader[i], reader[i:j] (a lazy view) and iteration; a
+    record is parsed only when it is accessed, so memory use stays small
+    however large the file is. Line offsets come from the complete prefix of
+    the "<path>.idx" index kept by LogSegment; lines appended after the last
+    indexed one are found by scanning only that tail of the mapping. The
+    reader never writes the index, so it is safe to open on a segment that
+    another process is appending to. It sees the file as it was when
+    opened. Sealed .gz segments must be decompressed before they can be
+    mapped.
+    """
+
+    def __init__(self, path, _parent=None, _positions=None):
+        if _parent is not None:
+            self.path = _parent.path
+            self._data = _parent._data
+            self._indexed = _parent._indexed
+            self._tail = _parent._tail
+            self._positions = _positions
+            return
+        if path.endswith(".gz"):
+            raise ValueError(f"Cannot memory-map compressed file {path}; decompress it first")
+        self.path = path
+        self._data = None
+        self._indexed = array.array("Q")
+        self._tail = array.array("Q")
+        self._positions = range(0)
+        self._index_mmap = None
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            return
+        # Index first: every indexed line is then inside the mapping taken next
+        index_path = path + ".idx"
+        count, indexed_end = LogSegment.indexed_prefix(path, index_path)
+        if count and sys.byteorder == "little":
+            with open(index_path, "rb") as index:
+                self._index_mmap = mmap.mmap(index.fileno(), count * OFFSET.size, access=mmap.ACCESS_READ)
+            self._indexed = memoryview(self._index_mmap).cast("Q")
+        elif count:
+            with open(index_path, "rb") as index:
+                self._indexed = array.array("Q", (offset for (offset,) in OFFSET.iter_unpack(index.read(count * OFFSET.size))))
+        with open(path, "rb") as f:
+            self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._tail = self._scan(indexed_end)
+        self._positions = range(len(self._indexed) + len(self._tail))
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return ResultReader(None, _parent=self, _positions=self._positions[item])
+        return json.loads(self.raw(item))
+
+    def __iter__(self):
+        for position in self._positions:
+            yield json.loads(self._line(position))
+
+    def raw(self, item):
+        """Return record item as undecoded bytes"""
+        return self._line(self._positions[item])
+
+    def close(self):
+        """Release the mappings; views taken from this reader become unusable"""
+        if isinstance(self._indexed, memoryview):
+            self._indexed.release()
+        for mapping in (getattr(self, "_index_mmap", None), self._data):
+            if mapping is not None:
+                mapping.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _line(self, position):
+        indexed = len(self._indexed)
+        start = self._indexed[position] if position < indexed else self._tail[position - indexed]
+        end = self._data.find(b"\n", start)
+        return self._data[start:end if end != -1 else len(self._data)]
+
+    def _scan(self, start):
+        """Find the start of every complete, non-blank line in the mapping from start on"""
+        offsets = array.array("Q")
+        while True:
+            end = self._data.find(b"\n", start)
+            if end == -1:
+                return offsets  # partial last line, still being written
+            if self._data[start:end].strip():
+                offsets.append(start)
+            start = end + 1
+
+
+class ResultLog:
+    """Segmented results log: one active JSONL segment plus sealed segments
+
+    Records are appended to the active segment. Once it passes
+    segment_max_bytes or is older than segment_max_age seconds it is
+    sealed: recorded in manifest.json with its record count and replaced by
+    a fresh segment. Readers see one sequence across all segments. Sealing
+    is only a manifest update; the writing process's maintenance thread then
+    compacts in the background, taking the log lock only to swap manifest
+    entries. Compaction gzips each sealed segment and writes its document
+    IDs to a small .ids sidecar, then drops segments older than
+    retention_days or beyond retention_bytes (oldest first). on_drop, when
+    given, is called with the document IDs of each dropped segment before
+    its files are deleted, so an index such as the result store can forget
+    them too. Rotation and compaction assume a single writing process.
+    """
+
+    def __init__(self, directory=None, segment_max_bytes=None, segment_max_age=None,
+                 retention_days=None, retention_bytes=None, legacy_path=None, on_drop=None):
+        self.directory = directory or Config.RESULT_LOG_DIR
+        self.segment_max_bytes = segment_max_bytes or Config.RESULT_SEGMENT_MAX_BYTES
+        self.segment_max_age = segment_max_age or Config.RESULT_SEGMENT_MAX_AGE
+        self.retention_days = retention_days if retention_days is not None else Config.RESULT_RETENTION_DAYS
+        self.retention_bytes = retention_bytes if retention_bytes is not None else Config.RESULT_RETENTION_BYTES
+        self.on_drop = on_drop
+        self.manifest_path = os.path.join(self.directory, MANIFEST)
+        self._lock = threading.RLock()
+        self._compact_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._maintenance = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._manifest = self._load_manifest()
+        if self._manifest is None:
+            self._manifest = {"next_id": 0, "segments": [], "active": None}
+            self._import_legacy(legacy_path if legacy_path is not None else Config.OUTPUT_FILENAME)
+            self._start_segment()
+        self._active = LogSegment(self._path(self._manifest["active"]["file"]))
+
+    @property
+    def path(self):
+        """Path of the active segment"""
+        return self._active.path
+
+    def append(self, lines):
+        """Append lines to the active segment, sealing it first if it is full or too old"""
+        with self._lock:
+            if self._maintenance is None and not self._stopping:
+                # The appending process owns maintenance; its first pass finishes earlier work
+                self._maintenance = threading.Thread(
+                    target=self._run_maintenance, name="result-log-maintenance", daemon=True
+                )
+                self._maintenance.start()
+                self._wake.set()
+            if self._rotation_due():
+                self.rotate()
+            self._active.append(lines)
+
+    def sync(self):
+        with self._lock:
+            self._active.sync()
+
+    def close(self):
+        """Close the active segment and stop maintenance once its current step is done"""
+        with self._lock:
+            self._active.close()
+            self._stopping = True
+            maintenance = self._maintenance
+        self._wake.set()
+        if maintenance is not None:
+            maintenance.join()
+
+    def __len__(self):
+        with self._lock:
+            return self._sealed_records() + len(self._active)
+
+    def __iter__(self):
+        """Yield every record, oldest first, across sealed and active segments"""
+        with self._lock:
+            # Open sealed files up front; compaction may unlink them while we read
+            handles = [self._open(segment) for segment in self._manifest["segments"]]
+            active_path = self._active.path
+        for handle in handles:
+            with handle:
+                for line in self._lines(handle):
+                    yield json.loads(line)
+        if os.path.exists(active_path):
+            with open(active_path, "rb") as f:
+                for line in self._lines(f):
+                    yield json.loads(line)
+
+    def latest(self):
+        """Return the most recent record, or None when the log is empty"""
+        return self.get(-1)
+
+    def get(self, position):
+        """Return record number position across all segments (negative counts from the end), or None"""
+        with self._lock:
+            sealed_records = self._sealed_records()
+            active_records = len(self._active)
+            if position < 0:
+                position += sealed_records + active_records
+            if not 0 <= position < sealed_records + active_records:
+                return None
+            if position >= sealed_records:
+                return self._active.get(position - sealed_records)
+            for segment in self._manifest["segments"]:
+                if position < segment["records"]:
+                    handle = self._open(segment)
+                    index_path = self._path(segment["file"]) + ".idx"
+                    index = open(index_path, "rb") if os.path.exists(index_path) else None
+                    break
+                position -= segment["records"]
+        with handle:
+            if index is not None:
+                # A segment not yet compressed still has its offset index
+                with index:
+                    index.seek(position * OFFSET.size)
+                    entry = index.read(OFFSET.size)
+                if len(entry) == OFFSET.size:
+                    handle.seek(OFFSET.unpack(entry)[0])
+                    return json.loads(handle.readline())
+            for number, line in enumerate(self._lines(handle)):
+                if number == position:
+                    return json.loads(line)
+        return None
+
+    def segments(self):
+        """Return the manifest entries of the sealed segments and the active one"""
+        with self._lock:
+            active = {**self._manifest["active"], "records": len(self._active), "bytes": self._active.size()}
+            return [dict(segment) for segment in self._manifest["segments"]] + [active]
+
+    def rotate(self):
+        """Seal the active segment and start a new one; compaction follows in the background"""
+        with self._lock:
+            records = len(self._active)
+            if records == 0:
+                return
+            self._active.close()
+            active = self._manifest["active"]
+            self._manifest["segments"].append({
+                "id": active["id"],
+                "file": active["file"],
+                "records": records,
+                "bytes": self._active.size(),
+                "created_at": active["created_at"],
+                "sealed_at": time.time()
+            })
+            self._start_segment()
+            self._active = LogSegment(self._path(self._manifest["active"]["file"]))
+            print(f"Sealed results segment {active['file']} ({records} records)")
+        self._wake.set()
+
+    def compact(self):
+        """Compress sealed segments and expire old ones
+
+        Called by the maintenance thread after each rotation. Files are read
+        and written without the log lock; it is held only to swap manifest
+        entries, so appends and reads are not blocked by the history size.
+        """
+        with self._compact_lock:
+            compressed = 0
+            for segment in self._sealed_snapshot():
+                if self._stopping:
+                    return
+                if "ids_file" not in segment:
+                    self._compress_segment(segment)
+                    compressed += 1
+            dropped = self._apply_retention()
+            if compressed or dropped:
+                print(f"Compacted results log: compressed {compressed} segments, "
+                      f"dropped {dropped} expired segments")
+
+    def _run_maintenance(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            if self._stopping:
+                return
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"Warning: Could not compact results log in {self.directory}: {e}")
+
+    def _compress_segment(self, segment):
+        """Gzip a sealed segment and write its .ids sidecar"""
+        source = self._path(segment["file"])
+        ids_file = f"segment-{segment['id']:06d}.ids"
+        self._write_ids(ids_file, self._read_ids(segment))
+        if source.endswith(".gz"):
+            # Already compressed (imported or from an older version): only the sidecar was missing
+            target_file = segment["file"]
+        else:
+            target_file = f"segment-{segment['id']:06d}.jsonl.gz"
+            self._copy_records(segment, target_file)
+
+        def update(entry):
+            entry.update({"file": target_file, "ids_file": ids_file,
+                          "bytes": os.path.getsize(self._path(target_file))})
+        self._swap(segment, update, obsolete=[] if target_file == segment["file"] else [source, source + ".idx"])
+
+    def _apply_retention(self):
+        """Drop sealed segments past retention_days, then the oldest beyond retention_bytes"""
+        with self._lock:
+            kept = list(self._manifest["segments"])
+            dropped = []
+            if self.retention_days:
+                cutoff = time.time() - self.retention_days * 86400
+                dropped = [segment for segment in kept if segment["sealed_at"] < cutoff]
+                kept = [segment for segment in kept if segment["sealed_at"] >= cutoff]
+            while self.retention_bytes and kept and sum(segment["bytes"] for segment in kept) > self.retention_bytes:
+                dropped.append(kept.pop(0))
+            dropped = [dict(segment) for segment in dropped]
+        if not dropped:
+            return 0
+        if self.on_drop is not None:
+            # Forget the records elsewhere first; if that fails the segments stay for the next pass
+            for segment in dropped:
+                self.on_drop(self._read_ids(segment))
+        dropped_ids = {segment["id"] for segment in dropped}
+        with self._lock:
+            self._manifest["segments"] = [
+                segment for segment in self._manifest["segments"] if segment["id"] not in dropped_ids
+            ]
+            self._write_manifest()
+        for segment in dropped:
+            self._remove_files(self._segment_files(segment))
+        return len(dropped)
+
+    def _swap(self, segment, update, obsolete=()):
+        """Apply update to segment's manifest entry under the lock, then delete obsolete files"""
+        with self._lock:
+            entry = next((e for e in self._manifest["segments"] if e["id"] == segment["id"]), None)
+            if entry is None:
+                return
+            update(entry)
+            if entry["records"] == 0:
+                self._manifest["segments"].remove(entry)
+                obsolete = list(obsolete) + self._segment_files(entry)
+            self._write_manifest()
+        self._remove_files(obsolete)
+
+    def _copy_records(self, segment, target_file):
+        """Gzip the complete records of segment into target_file"""
+        target = self._path(target_file)
+        with self._open(segment) as source, gzip.open(target + ".tmp", "wb") as out:
+            for line in self._lines(source):
+                out.write(line)
+        os.replace(target + ".tmp", target)
+
+    def _read_ids(self, segment):
+        """Document IDs in a sealed segment, from its sidecar when it has one"""
+        if "ids_file" in segment and os.path.exists(self._path(segment["ids_file"])):
+            with open(self._path(segment["ids_file"]), "r", encoding="utf-8") as f:
+                return [line.rstrip("\n") for line in f if line.strip()]
+        with self._open(segment) as f:
+            ids = (self._document_id(line) for line in self._lines(f))
+            return [document_id for document_id in ids if document_id is not None]
+
+    def _write_ids(self, ids_file, ids):
+        path = self._path(ids_file)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(f"{document_id}\n" for document_id in ids)
+        os.replace(path + ".tmp", path)
+
+    def _sealed_snapshot(self):
+        with self._lock:
+            return [dict(segment) for segment in self._manifest["segments"]]
+
+    def _sealed_records(self):
+        return sum(segment["records"] for segment in self._manifest["segments"])
+
+    def _segment_files(self, segment):
+        files = [self._path(segment["file"]), self._path(segment["file"]) + ".idx"]
+        if "ids_file" in segment:
+            files.append(self._path(segment["ids_file"]))
+        return files
+
+    def _rotation_due(self):
+        size = self._active.size()
+        if size >= self.segment_max_bytes:
+            return True
+        return size > 0 and time.time() - self._manifest["active"]["created_at"] >= self.segment_max_age
+
+    def _start_segment(self):
+        segment_id = self._manifest["next_id"]
+        self._manifest["next_id"] += 1
+        self._manifest["active"] = {
+            "id": segment_id,
+            "file": f"segment-{segment_id:06d}.jsonl",
+            "created_at": time.time()
+        }
+        self._write_manifest()
+
+    def _import_legacy(self, legacy_path):
+        """Copy a pre-segmentation results file in as the first sealed segment"""
+        # isfile: Docker creates a directory for a bind mount whose host file is missing
+        if not legacy_path or not os.path.isfile(legacy_path) or os.path.getsize(legacy_path) == 0:
+            return
+        segment_id = self._manifest["next_id"]
+        self._manifest["next_id"] += 1
+        sealed_file = f"segment-{segment_id:06d}.jsonl"
+        shutil.copyfile(legacy_path, self._path(sealed_file))
+        with open(self._path(sealed_file), "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                f.write(b"\n")
+        records = len(LogSegment(self._path(sealed_file)))
+        self._manifest["segments"].append({
+            "id": segment_id,
+            "file": sealed_file,
+            "records": records,
+            "bytes": os.path.getsize(self._path(sealed_file)),
+            "created_at": os.path.getmtime(legacy_path),
+            "sealed_at": time.time()
+        })
+        print(f"Imported {records} results from {legacy_path} into {sealed_file}")
+
+    def _open(self, segment):
+        path = self._path(segment["file"])
+        return gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")
+
+    @staticmethod
+    def _lines(f):
+        """Complete, non-blank lines; positions in a segment count only these"""
+        for line in f:
+            if not line.endswith(b"\n"):
+                return  # partial last line, still being written
+            if line.strip():
+                yield line
+
+    @staticmethod
+    def _document_id(line):
+        document_id = json.loads(line).get("document_id")
+        return str(document_id) if document_id is not None else None
+
+    @staticmethod
+    def _remove_files(paths):
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        """Replace manifest.json atomically so readers never see a partial manifest"""
+        temp_path = self.manifest_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(self._manifest, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.manifest_path)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
@@ -0,0 +1,345 @@
+import json
+import os
+import sqlite3
+import threading
+from config import Config
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id TEXT PRIMARY KEY,
+    created_at REAL NOT NULL,
+    model_id TEXT,
+    examples_type TEXT,
+    extractions_count INTEGER NOT NULL,
+    text_preview TEXT,
+    document TEXT NOT NULL,
+    models_answered TEXT
+);
+CREATE INDEX IF NOT EXISTS results_created ON results (created_at, id);
+CREATE INDEX IF NOT EXISTS results_model ON results (model_id, created_at, id);
+CREATE INDEX IF NOT EXISTS results_type ON results (examples_type, created_at, id);
+
+CREATE TABLE IF NOT EXISTS extractions (
+    id INTEGER PRIMARY KEY,
+    result_id TEXT NOT NULL REFERENCES results (id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    extraction_class TEXT NOT NULL,
+    extraction_text TEXT NOT NULL,
+    start_pos INTEGER,
+    end_pos INTEGER,
+    alignment_status TEXT
+);
+CREATE INDEX IF NOT EXISTS extractions_result ON extractions (result_id, position);
+CREATE INDEX IF NOT EXISTS extractions_class ON extractions (extraction_class, result_id);
+
+CREATE TABLE IF NOT EXISTS attributes (
+    extraction_id INTEGER NOT NULL REFERENCES extractions (id) ON DELETE CASCADE,
+    result_id TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS attributes_key_value ON attributes (key, value, result_id);
+CREATE INDEX IF NOT EXISTS attributes_extraction ON attributes (extraction_id);
+"""
+
+# Full-text index over extraction text and attribute values; rowid is extractions.id
+SEARCH_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS extraction_search USING fts5 (
+    extraction_text,
+    attribute_values,
+    extraction_class UNINDEXED,
+    result_id UNINDEXED
+);
+"""
+
+SEARCH_BACKFILL = """
+INSERT INTO extraction_search (rowid, extraction_text, attribute_values, extraction_class, result_id)
+SELECT e.id, e.extraction_text,
+       (SELECT group_concat(value, ' ') FROM attributes a WHERE a.extraction_id = e.id),
+       e.extraction_class, e.result_id
+FROM extractions e
+"""
+
+# bm25 column weights: a match in the extraction text counts more than one in an attribute
+SEARCH_WEIGHTS = (1.0, 0.5)
+
+PREVIEW_CHARS = 200
+DELETE_BATCH = 500
+
+
+class ResultStore:
+    """SQLite store of saved results, indexed for filtered queries
+
+    Each saved document becomes one row in results (with its full JSON),
+    one row per extraction and one row per attribute key/value, so results
+    can be filtered by time, model, examples type, extraction class and
+    attribute without scanning the history. An FTS5 index over extraction
+    text and attribute values, updated in the same transaction, backs
+    ranked full-text search. WAL mode lets request threads
+    read while the result writer commits; each thread uses its own
+    connection.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.RESULT_DB_PATH
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as connection:
+            connection.executescript(SCHEMA)
+            columns = {row[1] for row in connection.execute("PRAGMA table_info(results)")}
+            if "models_answered" not in columns:
+                # Stores created before answering models were recorded
+                connection.execute("ALTER TABLE results ADD COLUMN models_answered TEXT")
+            has_search = connection.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'extraction_search'"
+            ).fetchone()
+            connection.executescript(SEARCH_SCHEMA)
+            if not has_search:
+                # Stores created before the search index existed are indexed once
+                connection.execute(SEARCH_BACKFILL)
+
+    def _connect(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute("PRAGMA foreign_keys=ON")
+            self._local.connection = connection
+        return connection
+
+    def add(self, records):
+        """Insert (document_dict, metadata) pairs in one transaction"""
+        with self._connect() as connection:
+            for document, metadata in records:
+                extractions = document.get("extractions") or []
+                # Re-saving an ID replaces it; extraction and attribute rows cascade
+                connection.execute(
+                    "DELETE FROM extraction_search WHERE rowid IN (SELECT id FROM extractions WHERE result_id = ?)",
+                    (document["document_id"],)
+                )
+                connection.execute("DELETE FROM results WHERE id = ?", (document["document_id"],))
+                connection.execute(
+                    "INSERT INTO results (id, created_at, model_id, examples_type, extractions_count, "
+                    "text_preview, document, models_answered) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        document["document_id"],
+                        metadata.get("created_at"),
+                        metadata.get("model_id"),
+                        metadata.get("examples_type"),
+                        len(extractions),
+                        (document.get("text") or "")[:PREVIEW_CHARS],
+                        json.dumps(document, ensure_ascii=False),
+                        json.dumps(metadata["models_answered"]) if "models_answered" in metadata else None
+                    )
+                )
+                for position, extraction in enumerate(extractions):
+                    interval = extraction.get("char_interval") or {}
+                    cursor = connection.execute(
+                        "INSERT INTO extractions (result_id, position, extraction_class, extraction_text, "
+                        "start_pos, end_pos, alignment_status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            document["document_id"],
+                            position,
+                            extraction.get("extraction_class"),
+                            extraction.get("extraction_text"),
+                            interval.get("start_pos"),
+                            interval.get("end_pos"),
+                            extraction.get("alignment_status")
+                        )
+                    )
+                    attributes = [
+                        (cursor.lastrowid, document["document_id"], key, self._attribute_value(value))
+                        for key, value in (extraction.get("attributes") or {}).items()
+                    ]
+                    connection.executemany("INSERT INTO attributes VALUES (?, ?, ?, ?)", attributes)
+                    connection.execute(
+                        "INSERT INTO extraction_search (rowid, extraction_text, attribute_values, "
+                        "extraction_class, result_id) VALUES (?, ?, ?, ?, ?)",
+                        (
+                            cursor.lastrowid,
+                            extraction.get("extraction_text"),
+                            " ".join(value for _, _, _, value in attributes if value),
+                            extraction.get("extraction_class"),
+                            document["document_id"]
+                        )
+                    )
+
+    def delete(self, result_ids):
+        """Delete stored results by ID, with their extractions, attributes and search rows"""
+        result_ids = list(result_ids)
+        deleted = 0
+        with self._connect() as connection:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(result_ids), DELETE_BATCH):
+                batch = result_ids[start:start + DELETE_BATCH]
+                placeholders = ", ".join("?" * len(batch))
+                connection.execute(
+                    f"DELETE FROM extraction_search WHERE rowid IN "
+                    f"(SELECT id FROM extractions WHERE result_id IN ({placeholders}))",
+                    batch
+                )
+                deleted += connection.execute(
+                    f"DELETE FROM results WHERE id IN ({placeholders})", batch
+                ).rowcount
+        return deleted
+
+    def get(self, result_id):
+        """Return one stored result with its metadata, or None"""
+        row = self._connect().execute("SELECT * FROM results WHERE id = ?", (result_id,)).fetchone()
+        if row is None:
+            return None
+        return {**self._summary(row), "document": json.loads(row["document"])}
+
+    def query(self, model_id=None, examples_type=None, extraction_class=None, attribute=None,
+              since=None, until=None, cursor=None, limit=None):
+        """Return (results, next_cursor), newest first
+
+        attribute is "key" or "key=value". Pages are keyed on (created_at, id),
+        so each page is an index range scan no matter how deep it is; pass
+        next_cursor back as cursor for the following page.
+        """
+        limit = max(1, min(limit or Config.RESULT_PAGE_SIZE, Config.RESULT_MAX_PAGE_SIZE))
+        clauses = []
+        params = []
+        if model_id:
+            clauses.append("model_id = ?")
+            params.append(model_id)
+        if examples_type:
+            clauses.append("examples_type = ?")
+            params.append(examples_type)
+        if since is not None:
+            clauses.append("created_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("created_at < ?")
+            params.append(until)
+        if extraction_class:
+            clauses.append("id IN (SELECT result_id FROM extractions WHERE extraction_class = ?)")
+            params.append(extraction_class)
+        if attribute:
+            key, has_value, value = attribute.partition("=")
+            if has_value:
+                clauses.append("id IN (SELECT result_id FROM attributes WHERE key = ? AND value = ?)")
+                params.extend([key, value])
+            else:
+                clauses.append("id IN (SELECT result_id FROM attributes WHERE key = ?)")
+                params.append(key)
+        if cursor:
+            created_at, result_id = self._decode_cursor(cursor)
+            clauses.append("(created_at < ? OR (created_at = ? AND id < ?))")
+            params.extend([created_at, created_at, result_id])
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        rows = self._connect().execute(
+            f"SELECT id, created_at, model_id, models_answered, examples_type, extractions_count, text_preview "
+            f"FROM results {where} ORDER BY created_at DESC, id DESC LIMIT ?",
+            (*params, limit + 1)
+        ).fetchall()
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = f"{rows[-1]['created_at']!r}:{rows[-1]['id']}"
+        return [self._summary(row) for row in rows], next_cursor
+
+    def search(self, text, extraction_classes=None, model_id=None, limit=None, offset=0):
+        """Return extractions matching every word of text, best match first
+
+        Words match whole tokens, case-insensitively; a trailing * matches a
+        prefix. Ranking is bm25 over extraction text and attribute values.
+        extraction_classes restricts hits to those classes.
+        """
+        match = self._match_expression(text)
+        limit = max(1, min(limit or Config.RESULT_PAGE_SIZE, Config.RESULT_MAX_PAGE_SIZE))
+        clauses = ["extraction_search MATCH ?"]
+        params = [match]
+        if extraction_classes:
+            clauses.append(f"s.extraction_class IN ({', '.join('?' for _ in extraction_classes)})")
+            params.extend(extraction_classes)
+        if model_id:
+            clauses.append("r.model_id = ?")
+            params.append(model_id)
+
+        connection = self._connect()
+        rows = connection.execute(
+            f"SELECT e.id, e.result_id, e.extraction_class, e.extraction_text, e.start_pos, e.end_pos, "
+            f"r.model_id, r.created_at, bm25(extraction_search, {', '.join(map(str, SEARCH_WEIGHTS))}) AS score "
+            f"FROM extraction_search s JOIN extractions e ON e.id = s.rowid JOIN results r ON r.id = e.result_id "
+            f"WHERE {' AND '.join(clauses)} ORDER BY score LIMIT ? OFFSET ?",
+            (*params, limit, max(0, offset or 0))
+        ).fetchall()
+
+        attributes = {}
+        if rows:
+            for row in connection.execute(
+                f"SELECT extraction_id, key, value FROM attributes "
+                f"WHERE extraction_id IN ({', '.join('?' for _ in rows)})",
+                [row["id"] for row in rows]
+            ):
+                attributes.setdefault(row["extraction_id"], {})[row["key"]] = row["value"]
+
+        return [
+            {
+                "result_id": row["result_id"],
+                "extraction_class": row["extraction_class"],
+                "extraction_text": row["extraction_text"],
+                "start_pos": row["start_pos"],
+                "end_pos": row["end_pos"],
+                "attributes": attributes.get(row["id"], {}),
+                "model_id": row["model_id"],
+                "created_at": row["created_at"],
+                # bm25 is lower for better matches; flip it so higher ranks first
+                "score": round(-row["score"], 4)
+            }
+            for row in rows
+        ]
+
+    def stats(self):
+        connection = self._connect()
+        return {
+            "results": connection.execute("SELECT COUNT(*) FROM results").fetchone()[0],
+            "extractions": connection.execute("SELECT COUNT(*) FROM extractions").fetchone()[0]
+        }
+
+    @staticmethod
+    def _summary(row):
+        return {
+            "id": row["id"],
+            "created_at": row["created_at"],
+            "model_id": row["model_id"],
+            "models_answered": json.loads(row["models_answered"]) if row["models_answered"] else None,
+            "examples_type": row["examples_type"],
+            "extractions_count": row["extractions_count"],
+            "text_preview": row["text_preview"]
+        }
+
+    @staticmethod
+    def _attribute_value(value):
+        if value is None or isinstance(value, str):
+            return value
+        return json.dumps(value, ensure_ascii=False)
+
+    @staticmethod
+    def _match_expression(text):
+        """Quote each word so FTS5 operators in user input are taken literally"""
+        terms = []
+        for word in (text or "").split():
+            prefix = word.endswith("*") and len(word) > 1
+            word = word.rstrip("*").replace('"', '""')
+            if word:
+                terms.append(f'"{word}"' + ("*" if prefix else ""))
+        if not terms:
+            raise ValueError("Search text is required")
+        return " AND ".join(terms)
+
+    @staticmethod
+    def _decode_cursor(cursor):
+        try:
+            created_at, result_id = cursor.split(":", 1)
+            return float(created_at), result_id
+        except ValueError:
+            raise ValueError(f"Invalid cursor: {cursor}")
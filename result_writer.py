@@ -0,0 +1,142 @@
+import json
+import queue
+import threading
+import time
+from langextract import data_lib
+from config import Config
+from result_log import ResultLog
+
+
+class ResultWriter:
+    """Appends extraction results to the results file from a background thread
+
+    Requests only put (document, metadata) pairs on a queue. A single writer thread drains it
+    in batches (group commit): after the first document arrives it waits up
+    to flush_interval for more, serializes the batch and appends it to the
+    result log with one write on an O_APPEND descriptor. Each record is a
+    complete line, and lines from concurrent requests or processes never
+    interleave. fsync policy is "always" (after every batch), "interval"
+    (at most once per fsync_interval) or "never" (left to the OS). When a
+    result store is given, each batch is also inserted into it in one
+    transaction.
+    """
+
+    def __init__(self, log=None, store=None, flush_interval=None, fsync=None, fsync_interval=None,
+                 max_batch=None, queue_size=None):
+        self.log = log or ResultLog()
+        self.store = store
+        self.flush_interval = flush_interval if flush_interval is not None else Config.RESULT_FLUSH_INTERVAL
+        self.fsync = fsync or Config.RESULT_FSYNC
+        self.fsync_interval = fsync_interval if fsync_interval is not None else Config.RESULT_FSYNC_INTERVAL
+        self.max_batch = max_batch or Config.RESULT_BATCH_SIZE
+        if self.fsync not in ("always", "interval", "never"):
+            raise ValueError(f"Unknown fsync policy: {self.fsync}")
+
+        self._queue = queue.Queue(maxsize=queue_size if queue_size is not None else Config.RESULT_QUEUE_SIZE)
+        self._counters = {"written": 0, "batches": 0, "errors": 0, "store_errors": 0}
+        self._lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._dirty = False
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="result-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, documents, metadata):
+        """Queue annotated documents, with one metadata dict each, and return immediately
+
+        Blocks only when the queue is full, which pushes back on requests
+        if the disk cannot keep up.
+        """
+        if self._closed:
+            raise RuntimeError("Result writer is closed")
+        for document, document_metadata in zip(documents, metadata):
+            self._queue.put((document, document_metadata))
+        return len(documents)
+
+    def flush(self):
+        """Block until every document queued so far has been written"""
+        self._queue.join()
+
+    def close(self):
+        """Write everything still queued, then stop the writer thread"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {**counters, "queued": self._queue.qsize(), "fsync": self.fsync}
+
+    def _run(self):
+        try:
+            stopping = False
+            while not stopping:
+                try:
+                    first = self._queue.get(timeout=self.fsync_interval)
+                except queue.Empty:
+                    self._maybe_fsync(idle=True)
+                    continue
+                batch, stopping = self._collect(first)
+                if batch:
+                    self._write(batch)
+                for _ in range(len(batch) + (1 if stopping else 0)):
+                    self._queue.task_done()
+            if self._dirty and self.fsync != "never":
+                self.log.sync()
+        finally:
+            self.log.close()
+
+    def _collect(self, first):
+        """Gather up to max_batch documents arriving within flush_interval"""
+        if first is None:
+            return [], True
+        batch = [first]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.monotonic()
+            try:
+                document = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if document is None:
+                return batch, True
+            batch.append(document)
+        return batch, False
+
+    def _write(self, batch):
+        try:
+            records = [
+                (data_lib.annotated_document_to_dict(document), metadata)
+                for document, metadata in batch
+            ]
+            self.log.append([json.dumps(record, ensure_ascii=False) + "\n" for record, _ in records])
+            self._dirty = True
+            self._maybe_fsync()
+            with self._lock:
+                self._counters["written"] += len(batch)
+                self._counters["batches"] += 1
+        except Exception as e:
+            print(f"Warning: Could not write {len(batch)} results to {self.log.path}: {e}")
+            with self._lock:
+                self._counters["errors"] += len(batch)
+            return
+
+        if self.store is not None:
+            try:
+                self.store.add(records)
+            except Exception as e:
+                print(f"Warning: Could not index {len(batch)} results in {self.store.path}: {e}")
+                with self._lock:
+                    self._counters["store_errors"] += len(batch)
+
+    def _maybe_fsync(self, idle=False):
+        if not self._dirty or self.fsync == "never":
+            return
+        due = time.monotonic() - self._last_fsync >= self.fsync_interval
+        if self.fsync == "always" or due or idle:
+            self.log.sync()
+            self._dirty = False
+            self._last_fsync = time.monotonic()
@@ -0,0 +1,66 @@
+import threading
+
+
+class _Call:
+    """An in-flight call that other threads can wait on"""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution
+
+    The first caller for a key runs the function; callers that arrive while it
+    is still running block until it finishes and receive the same result, or
+    the same exception.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._counters = {"executions": 0, "coalesced": 0}
+
+    def do(self, key, func):
+        """Run func for key, or wait for the call already in flight
+
+        Returns (result, shared) where shared is True when this caller joined
+        another caller's execution instead of running func itself.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._counters["coalesced"] += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self._counters["executions"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+        return call.result, False
+
+    def stats(self):
+        """Return execution and coalescing counters"""
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
@@ -207,7 +207,7 @@ async function processText() {
         
         console.log(`Processing with model: ${selectedModel}`);
         
-        const response = await fetch('/predict', {
+        const response = await fetch('/predict/stream', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
             body: JSON.stringify({ 
@@ -217,20 +217,47 @@ async function processText() {
             })
         });
         
-        const data = await response.json();
-        
-        if (data.error) {
+        if (!response.ok) {
+            const data = await response.json();
             outputContent.innerHTML = `<p style="color: #ff6b6b;">Error: ${data.error}</p>`;
             return;
         }
         
-        // Process and display the results
-        displayExtractions(inputText, data.result);
+        // Keep section results in document order even though they arrive out of order
+        const sectionExtractions = [];
+        let sectionsDone = 0;
+        let finalEvent = null;
+        
+        await readExtractionStream(response, event => {
+            if (event.event === 'start') {
+                outputContent.innerHTML = `<p style="color: #888;">Processing... (0/${event.sections} sections)</p>`;
+            } else if (event.event === 'extractions') {
+                sectionExtractions[event.section] = event.extractions;
+                sectionsDone++;
+                const extractions = sectionExtractions.flat().filter(Boolean);
+                if (extractions.length > 0) {
+                    displayExtractions(inputText, { extractions });
+                }
+                setLoadingProgress(sectionsDone, event.sections);
+            } else if (event.event === 'error') {
+                throw new Error(event.error);
+            } else if (event.event === 'done') {
+                finalEvent = event;
+            }
+        });
+        
+        if (!finalEvent) {
+            throw new Error('Extraction stream ended unexpectedly');
+        }
+        
+        // The final event carries the list with cross-chunk duplicates merged
+        const extractions = finalEvent.extractions || sectionExtractions.flat().filter(Boolean);
+        displayExtractions(inputText, { extractions });
         
         // Show success message with extraction count, type info, and model used
-        let message = `Extraction completed! Found ${data.extractions_count} entities using ${selectedModel}.`;
-        if (data.examples_type) {
-            message += ` (Examples: ${data.examples_type})`;
+        let message = `Extraction completed! Found ${finalEvent.extractions_count} entities using ${finalEvent.model_used || selectedModel}.`;
+        if (finalEvent.examples_type) {
+            message += ` (Examples: ${finalEvent.examples_type})`;
         }
         showNotification(message, 'success');
         
@@ -242,6 +269,39 @@ async function processText() {
     }
 }
 
+async function readExtractionStream(response, onEvent) {
+    // Parse an NDJSON response body, calling onEvent for each complete line
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    
+    while (true) {
+        const { done, value } = await reader.read();
+        buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+        
+        let newlineIndex;
+        while ((newlineIndex = buffer.indexOf('\n')) !== -1) {
+            const line = buffer.slice(0, newlineIndex).trim();
+            buffer = buffer.slice(newlineIndex + 1);
+            if (line) {
+                onEvent(JSON.parse(line));
+            }
+        }
+        
+        if (done) {
+            if (buffer.trim()) {
+                onEvent(JSON.parse(buffer));
+            }
+            return;
+        }
+    }
+}
+
+function setLoadingProgress(completed, total) {
+    const processBtn = document.getElementById('processBtn');
+    processBtn.textContent = `Processing... (${completed}/${total})`;
+}
+
 function setLoadingState(loading) {
     const processBtn = document.getElementById('processBtn');
     const container = document.querySelector('.container');
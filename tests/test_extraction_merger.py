@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import langextract as lx
+from extraction_merger import ExtractionMerger
+
+
+def extraction(extraction_class, text, start=None, end=None, status="match_exact"):
+    interval = lx.data.CharInterval(start_pos=start, end_pos=end) if start is not None else None
+    return lx.data.Extraction(
+        extraction_class=extraction_class,
+        extraction_text=text,
+        char_interval=interval,
+        alignment_status=lx.data.AlignmentStatus(status) if status else None,
+    )
+
+
+class ExtractionMergerTest(unittest.TestCase):
+    def setUp(self):
+        self.merger = ExtractionMerger(min_overlap=0.5)
+
+    def test_better_alignment_wins_over_longer_span(self):
+        fuzzy = extraction("analysis_body", "HR=0.62, p<0.001 overall", 10, 34, "match_fuzzy")
+        exact = extraction("analysis_body", "HR=0.62, p<0.001", 10, 26)
+        self.assertEqual(self.merger.merge([fuzzy, exact]), [exact])
+
+    def test_longer_span_wins_at_equal_alignment(self):
+        short = extraction("analysis_body", "HR=0.62", 10, 17)
+        long = extraction("analysis_body", "HR=0.62, p<0.001", 10, 26)
+        self.assertEqual(self.merger.merge([short, long]), [long])
+
+    def test_earlier_chunk_wins_an_exact_tie(self):
+        first = extraction("analysis_body", "HR=0.62", 10, 17)
+        second = extraction("analysis_body", "HR=0.62", 10, 17)
+        merged = self.merger.merge([first, second])
+        self.assertEqual(len(merged), 1)
+        self.assertIs(merged[0], first)
+
+    def test_small_overlap_and_other_classes_are_kept(self):
+        first = extraction("analysis_body", "0123456789", 0, 10)
+        neighbour = extraction("analysis_body", "89abcdefgh", 8, 18)
+        other_class = extraction("recommendations_section", "0123456789", 0, 10)
+        merged = self.merger.merge([neighbour, other_class, first])
+        self.assertEqual(len(merged), 3)
+        self.assertEqual([e.char_interval.start_pos for e in merged], [0, 0, 8])
+
+    def test_unpositioned_extractions_dedupe_on_class_and_text(self):
+        first = extraction("report_header", "PHASE:  Phase II", status=None)
+        second = extraction("report_header", "phase: phase ii", status=None)
+        positioned = extraction("report_header", "PHASE: Phase II", 0, 15)
+        merged = self.merger.merge([first, second, positioned])
+        self.assertEqual(merged, [positioned, first])
+
+
+if __name__ == "__main__":
+    unittest.main()
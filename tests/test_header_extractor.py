@@ -0,0 +1,61 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from header_extractor import HeaderExtractor
+from report_chunker import ReportChunker
+from report_examples import PharmSectionType
+
+
+HEADER = (
+    "PROTOCOL NUMBER: ONCO-2024-157\n"
+    "STUDY TITLE: Phase III Randomized Trial of XK-429\n"
+    "REGULATORY STATUS: FDA IND 123456\n"
+    "IRB APPROVAL: Western University IRB #2024-0892\n"
+)
+
+
+class HeaderExtractorTest(unittest.TestCase):
+    def setUp(self):
+        self.extractor = HeaderExtractor()
+
+    def test_header_only_text_needs_no_model(self):
+        header, body_start = self.extractor.extract(HEADER)
+        self.assertEqual(len(header), 4)
+        self.assertEqual(body_start, len(HEADER))
+        self.assertEqual(header[0].extraction_text, "PROTOCOL NUMBER: ONCO-2024-157")
+        self.assertEqual(header[2].attributes["section"], "Regulatory Status")
+        self.assertEqual(header[3].attributes["section"], "Approval Information")
+        for extraction in header:
+            span = HEADER[extraction.char_interval.start_pos:extraction.char_interval.end_pos]
+            self.assertEqual(span, extraction.extraction_text)
+
+    def test_recommendation_and_footer_labels_are_not_header(self):
+        text = ("DOSING RECOMMENDATIONS: Start at 10 mg daily and titrate weekly.\n"
+                "REGULATORY COMPLIANCE: Study conducted per ICH-GCP E6(R2).")
+        header, body_start = self.extractor.extract(text)
+        self.assertEqual(header, [])
+        self.assertEqual(body_start, 0)
+
+    def test_result_label_is_not_header(self):
+        header, body_start = self.extractor.extract("PRIMARY ENDPOINT: met (HR=0.62, p<0.001)")
+        self.assertEqual(header, [])
+        self.assertEqual(body_start, 0)
+
+    def test_header_run_stops_at_first_body_label(self):
+        text = HEADER + "\nDOSING RECOMMENDATIONS: Start at 10 mg daily.\n"
+        header, body_start = self.extractor.extract(text)
+        self.assertEqual(len(header), 4)
+        self.assertEqual(text[body_start:].strip(), "DOSING RECOMMENDATIONS: Start at 10 mg daily.")
+
+    def test_chunker_classifies_body_labels_outside_header(self):
+        chunker = ReportChunker(target_chars=0, max_chars=1000, overlap=0)
+        text = "PRIMARY ENDPOINT: met (HR=0.62, p<0.001)\n\nDOSING RECOMMENDATIONS: Start at 10 mg daily."
+        kinds = [chunk.kind for chunk in chunker.split(text)]
+        self.assertEqual(kinds, [PharmSectionType.ANALYSIS.value, PharmSectionType.RECOMMENDATIONS.value])
+
+
+if __name__ == "__main__":
+    unittest.main()
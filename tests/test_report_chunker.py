@@ -0,0 +1,51 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from report_chunker import ReportChunker
+from report_examples import PharmSectionType
+
+
+LONG_BLOCK = " ".join(f"Sentence number {n} reports a secondary endpoint." for n in range(6))
+
+
+class ReportChunkerTest(unittest.TestCase):
+    def test_chunk_at_a_sentence_cut_starts_overlap_characters_early(self):
+        chunker = ReportChunker(target_chars=0, max_chars=120, overlap=30)
+        chunks = chunker.split(LONG_BLOCK)
+
+        self.assertGreater(len(chunks), 1)
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertLess(chunk.start, previous.end)
+            self.assertLessEqual(previous.end - chunk.start, 30 + 2)
+            # The overlap is snapped to a word boundary
+            self.assertEqual(LONG_BLOCK[chunk.start - 1], " ")
+        for chunk in chunks:
+            self.assertEqual(chunk.text, LONG_BLOCK[chunk.start:chunk.end])
+        self.assertEqual(chunks[-1].end, len(LONG_BLOCK))
+
+    def test_chunk_at_a_blank_line_has_no_overlap(self):
+        text = "First analysis paragraph.\n\nSecond analysis paragraph."
+        chunks = ReportChunker(target_chars=0, max_chars=1000, overlap=30).split(text)
+        self.assertEqual([chunk.text for chunk in chunks],
+                         ["First analysis paragraph.", "Second analysis paragraph."])
+
+    def test_neighbouring_blocks_are_packed_up_to_target(self):
+        text = "\n\n".join(f"Paragraph {n} of the analysis body." for n in range(10))
+        chunks = ReportChunker(target_chars=120, max_chars=1000, overlap=0).split(text)
+        self.assertLess(len(chunks), 10)
+        self.assertTrue(all(len(chunk.text) <= 120 for chunk in chunks))
+        self.assertEqual(chunks[0].start, 0)
+        self.assertEqual(chunks[-1].end, len(text))
+
+    def test_header_block_is_classified_before_body(self):
+        text = "PROTOCOL NUMBER: ONCO-2024-157\nPHASE: Phase III\n\nEFFICACY ANALYSIS: HR=0.62."
+        chunks = ReportChunker(target_chars=0, max_chars=1000, overlap=0).split(text)
+        self.assertEqual([chunk.kind for chunk in chunks],
+                         [PharmSectionType.HEADER.value, PharmSectionType.ANALYSIS.value])
+
+
+if __name__ == "__main__":
+    unittest.main()
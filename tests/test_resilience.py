@@ -0,0 +1,107 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resilience import CircuitBreaker, CircuitOpenError, ProviderUnavailableError, ResilientCaller
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = 100.0
+        patcher = mock.patch("resilience.time.monotonic", side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10)
+
+    def open_circuit(self):
+        self.breaker.record_failure()
+        self.breaker.record_failure()
+
+    def test_opens_after_threshold_consecutive_failures(self):
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_success_resets_the_failure_count(self):
+        self.breaker.record_failure()
+        self.breaker.record_success()
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    def test_half_open_lets_one_trial_through(self):
+        self.open_circuit()
+        self.clock += 10
+        self.assertTrue(self.breaker.allow())
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_trial_success_closes_and_failure_reopens(self):
+        self.open_circuit()
+        self.clock += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_success()
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+        self.open_circuit()
+        self.clock += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.record_failure()
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(self.breaker.allow())
+
+    def test_release_frees_the_trial_slot(self):
+        self.open_circuit()
+        self.clock += 10
+        self.assertTrue(self.breaker.allow())
+        self.breaker.release()
+        self.assertTrue(self.breaker.allow())
+
+
+class ResilientCallerTest(unittest.TestCase):
+    def setUp(self):
+        self.caller = ResilientCaller(fallbacks={"pro": "flash"}, max_attempts=2, base_delay=0, max_delay=0)
+
+    def test_open_circuit_routes_to_the_fallback(self):
+        for _ in range(self.caller.breaker("pro").failure_threshold):
+            self.caller.breaker("pro").record_failure()
+        self.assertEqual(self.caller.call(lambda model: f"answer from {model}", "pro"),
+                         ("answer from flash", "flash"))
+
+    def test_open_circuit_without_fallback_fails_fast(self):
+        for _ in range(self.caller.breaker("flash").failure_threshold):
+            self.caller.breaker("flash").record_failure()
+        with self.assertRaises(CircuitOpenError):
+            self.caller.call(lambda model: self.fail("called an open circuit"), "flash")
+
+    def test_transient_errors_are_retried_then_reported(self):
+        calls = []
+
+        def flaky(model):
+            calls.append(model)
+            raise TimeoutError("deadline exceeded")
+
+        with self.assertRaises(ProviderUnavailableError):
+            self.caller.call(flaky, "pro")
+        self.assertEqual(calls, ["pro", "pro"])
+        self.assertEqual(self.caller.breaker("pro").failures, 2)
+
+    def test_fatal_errors_are_not_retried_or_counted(self):
+        calls = []
+
+        def invalid(model):
+            calls.append(model)
+            raise ValueError("bad input")
+
+        with self.assertRaises(ValueError):
+            self.caller.call(invalid, "pro")
+        self.assertEqual(calls, ["pro"])
+        self.assertEqual(self.caller.breaker("pro").failures, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
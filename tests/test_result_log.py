@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from result_log import OFFSET, LogSegment, ResultLog, ResultReader
+from result_store import ResultStore
+
+
+def line(record):
+    return json.dumps(record) + "\n"
+
+
+class ResultReaderTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "segment-000000.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reader_opened_between_data_and_index_write_leaves_index_alone(self):
+        segment = LogSegment(self.path)
+        segment.append([line({"n": 0})])
+
+        # The writer's data write for the next record has landed, its index write has not
+        start = os.lseek(segment._data_fd, 0, os.SEEK_END)
+        os.write(segment._data_fd, line({"n": 1}).encode("utf-8"))
+        with open(segment.index_path, "rb") as index:
+            index_before = index.read()
+
+        with ResultReader(self.path) as reader:
+            self.assertEqual(len(reader), 2)
+            self.assertEqual([record["n"] for record in reader], [0, 1])
+        with open(segment.index_path, "rb") as index:
+            self.assertEqual(index.read(), index_before)
+
+        # The writer completes its append
+        os.write(segment._index_fd, OFFSET.pack(start))
+        segment.close()
+
+        fresh = LogSegment(self.path)
+        self.assertEqual(len(fresh), 2)
+        self.assertEqual([fresh.get(0), fresh.get(1)], [{"n": 0}, {"n": 1}])
+
+    def test_reader_indexes_unindexed_tail_in_memory(self):
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.writelines(line({"n": n}) for n in range(5))
+            f.write('{"n": ')  # partial line still being written
+
+        with ResultReader(self.path) as reader:
+            self.assertEqual(len(reader), 5)
+            self.assertEqual(reader[-1], {"n": 4})
+            self.assertEqual([record["n"] for record in reader[1:4]], [1, 2, 3])
+        self.assertFalse(os.path.exists(self.path + ".idx"))
+
+
+class ResultLogCompactionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.log = ResultLog(self.directory.name, segment_max_bytes=1 << 20, segment_max_age=3600,
+                             retention_days=0, retention_bytes=0, legacy_path="")
+
+    def tearDown(self):
+        self.log.close()
+        self.directory.cleanup()
+
+    def test_records_without_document_id_are_kept(self):
+        self.log.append([line({"n": n}) for n in range(10)])
+        self.log.rotate()
+        self.log.compact()
+        self.assertEqual([record["n"] for record in self.log], list(range(10)))
+
+    def test_compaction_keeps_every_copy_of_a_document_id(self):
+        self.log.append([line({"document_id": "a", "v": 1}), line({"document_id": "a", "v": 2})])
+        self.log.rotate()
+        self.log.compact()
+        self.assertEqual([record["v"] for record in self.log], [1, 2])
+
+
+class ResultLogRetentionTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.store = ResultStore(os.path.join(self.directory.name, "results.db"))
+        self.log = ResultLog(os.path.join(self.directory.name, "log"), segment_max_bytes=1 << 20,
+                             segment_max_age=3600, retention_days=0, retention_bytes=1,
+                             legacy_path="", on_drop=self.store.delete)
+
+    def tearDown(self):
+        self.log.close()
+        self.directory.cleanup()
+
+    def save(self, document_id):
+        document = {"document_id": document_id, "text": "EMA approval",
+                    "extractions": [{"extraction_class": "regulatory_footer", "extraction_text": "EMA"}]}
+        self.store.add([(document, {"created_at": 0.0, "model_id": "m"})])
+        self.log.append([line(document)])
+
+    def test_dropped_segments_are_deleted_from_the_store(self):
+        self.save("old")
+        self.log.rotate()
+        self.save("new")
+        self.log.compact()
+
+        self.assertEqual([record["document_id"] for record in self.log], ["new"])
+        self.assertIsNone(self.store.get("old"))
+        self.assertIsNotNone(self.store.get("new"))
+        self.assertEqual([hit["result_id"] for hit in self.store.search("EMA")], ["new"])
+        self.assertEqual(self.store.stats(), {"results": 1, "extractions": 1})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from single_flight import SingleFlight
+
+
+class SingleFlightTest(unittest.TestCase):
+    def setUp(self):
+        self.flight = SingleFlight()
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def join_in_flight(self, func):
+        """Start a leader running func and a follower on the same key; return the follower's outcome"""
+        def blocking():
+            self.started.set()
+            self.release.wait(5)
+            return func()
+
+        outcomes = {}
+
+        def run(name, target):
+            try:
+                outcomes[name] = ("result", self.flight.do("key", target))
+            except Exception as e:
+                outcomes[name] = ("error", e)
+
+        leader = threading.Thread(target=run, args=("leader", blocking))
+        leader.start()
+        self.started.wait(5)
+        follower = threading.Thread(target=run, args=("follower", lambda: self.fail("follower ran")))
+        follower.start()
+        deadline = time.monotonic() + 5
+        while self.flight.stats()["coalesced"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        self.release.set()
+        leader.join(5)
+        follower.join(5)
+        return outcomes
+
+    def test_follower_shares_the_leader_result(self):
+        outcomes = self.join_in_flight(lambda: "extracted")
+        self.assertEqual(outcomes["leader"], ("result", ("extracted", False)))
+        self.assertEqual(outcomes["follower"], ("result", ("extracted", True)))
+        self.assertEqual(self.flight.stats(), {"executions": 1, "coalesced": 1, "in_flight": 0})
+
+    def test_follower_receives_the_leader_error(self):
+        error = RuntimeError("provider down")
+
+        def fail():
+            raise error
+
+        outcomes = self.join_in_flight(fail)
+        self.assertEqual(outcomes["leader"], ("error", error))
+        self.assertEqual(outcomes["follower"], ("error", error))
+
+    def test_key_is_released_after_an_error(self):
+        with self.assertRaises(ValueError):
+            self.flight.do("key", lambda: (_ for _ in ()).throw(ValueError("bad input")))
+        self.assertEqual(self.flight.do("key", lambda: 42), (42, False))
+        self.assertEqual(self.flight.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
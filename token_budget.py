@@ -0,0 +1,135 @@
+import json
+import math
+from config import Config
+
+# Rough allowance for the Q:/A: framing and JSON punctuation around each example
+EXAMPLE_OVERHEAD_TOKENS = 16
+
+
+class TokenBudget:
+    """Estimates request size and trims few-shot examples to fit a budget
+
+    LangExtract renders the prompt description and every example into each
+    chunk's request, so the per-call size is prompt + examples + one chunk
+    of input. That per-call estimate is what the budget is checked against;
+    the total across all chunks is reported alongside it.
+    """
+
+    def __init__(self, max_tokens=None, chars_per_token=None, chunk_chars=None, min_examples=None):
+        self.max_tokens = max_tokens if max_tokens is not None else Config.TOKEN_BUDGET
+        self.chars_per_token = chars_per_token or Config.CHARS_PER_TOKEN
+        self.chunk_chars = chunk_chars or Config.MAX_CHAR_BUFFER
+        self.min_examples = min_examples if min_examples is not None else Config.TOKEN_BUDGET_MIN_EXAMPLES
+        self._example_tokens = {}
+
+    def estimate(self, text):
+        """Estimate the token count of a piece of text"""
+        return math.ceil(len(text) / self.chars_per_token) if text else 0
+
+    def estimate_example(self, example):
+        """Estimate the tokens an example adds to the prompt, memoized per instance"""
+        tokens = self._example_tokens.get(id(example))
+        if tokens is None:
+            answer = [
+                {
+                    extraction.extraction_class: extraction.extraction_text,
+                    f"{extraction.extraction_class}_attributes": extraction.attributes or {}
+                }
+                for extraction in example.extractions
+            ]
+            tokens = (
+                self.estimate(example.text)
+                + self.estimate(json.dumps(answer, ensure_ascii=False))
+                + EXAMPLE_OVERHEAD_TOKENS
+            )
+            # Examples are shared registry instances, so id() is stable
+            self._example_tokens[id(example)] = tokens
+        return tokens
+
+    def fit(self, prompt, examples, input_text, priorities=None):
+        """Drop low-priority examples until the per-call estimate fits
+
+        priorities holds one score per example (higher is kept longer). Examples
+        whose extraction classes are still covered by the others are dropped
+        before ones that would leave a class undemonstrated. Returns the kept
+        examples, in their original order, and a dict of token estimates.
+        """
+        examples = list(examples)
+        priorities = list(priorities) if priorities is not None else [0.0] * len(examples)
+
+        prompt_tokens = self.estimate(prompt)
+        input_tokens = self.estimate(input_text)
+        chunk_tokens = min(input_tokens, math.ceil(self.chunk_chars / self.chars_per_token))
+        example_tokens = [self.estimate_example(example) for example in examples]
+        chunks = max(1, math.ceil(len(input_text) / self.chunk_chars))
+
+        kept = set(range(len(examples)))
+
+        def per_call():
+            return prompt_tokens + sum(example_tokens[i] for i in kept) + chunk_tokens
+
+        dropped = 0
+        if self.max_tokens > 0 and per_call() > self.max_tokens:
+            for position in self._drop_order(examples, priorities):
+                if per_call() <= self.max_tokens or len(kept) <= self.min_examples:
+                    break
+                kept.discard(position)
+                dropped += 1
+
+        kept_examples = [examples[i] for i in sorted(kept)]
+        examples_total = sum(example_tokens[i] for i in kept)
+        per_call_tokens = per_call()
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "examples_tokens": examples_total,
+            "input_tokens": input_tokens,
+            "per_call_tokens": per_call_tokens,
+            "estimated_total_tokens": chunks * (prompt_tokens + examples_total) + input_tokens,
+            "chunks": chunks,
+            "examples_used": len(kept_examples),
+            "examples_dropped": dropped,
+            "budget": self.max_tokens,
+            "over_budget": self.max_tokens > 0 and per_call_tokens > self.max_tokens
+        }
+        return kept_examples, usage
+
+    def combine(self, usages):
+        """Add up the fit() estimates of the chunks of one request
+
+        Totals, chunk and dropped-example counts are summed; prompt, example
+        and per-call figures are those of the largest call.
+        """
+        usages = list(usages)
+        per_call_tokens = max(usage["per_call_tokens"] for usage in usages)
+        return {
+            "prompt_tokens": max(usage["prompt_tokens"] for usage in usages),
+            "examples_tokens": max(usage["examples_tokens"] for usage in usages),
+            "input_tokens": sum(usage["input_tokens"] for usage in usages),
+            "per_call_tokens": per_call_tokens,
+            "estimated_total_tokens": sum(usage["estimated_total_tokens"] for usage in usages),
+            "chunks": sum(usage["chunks"] for usage in usages),
+            "examples_used": max(usage["examples_used"] for usage in usages),
+            "examples_dropped": sum(usage["examples_dropped"] for usage in usages),
+            "budget": self.max_tokens,
+            "over_budget": self.max_tokens > 0 and per_call_tokens > self.max_tokens
+        }
+
+    def _drop_order(self, examples, priorities):
+        """Order example positions from first to last to drop"""
+        ascending = sorted(range(len(examples)), key=lambda i: (priorities[i], -i))
+        class_counts = {}
+        for example in examples:
+            for extraction_class in {e.extraction_class for e in example.extractions}:
+                class_counts[extraction_class] = class_counts.get(extraction_class, 0) + 1
+
+        redundant = []
+        essential = []
+        for position in ascending:
+            classes = {e.extraction_class for e in examples[position].extractions}
+            if all(class_counts[c] > 1 for c in classes):
+                redundant.append(position)
+                for c in classes:
+                    class_counts[c] -= 1
+            else:
+                essential.append(position)
+        return redundant + essential